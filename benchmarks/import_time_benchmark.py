@@ -0,0 +1,71 @@
+"""Import-time regression check for the scoring entry points (python -X importtime).
+
+Usage:
+    python benchmarks/import_time_benchmark.py [--module modeling.predict] [--budget-ms 75]
+
+Exits non-zero when the module's cumulative import time is over budget or when
+it pulls in one of the heavy dependencies that must stay lazy.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Must not be imported just by importing the entry point
+LAZY_DEPENDENCIES = ['lightgbm', 'pandas', 'numpy', 'pydantic', 'matplotlib', 'sklearn', 'yaml', 'pyarrow']
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every import made by `import module`"""
+    env = {**os.environ, 'PYTHONPATH': str(PROJECT_ROOT)}
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def best_cumulative_ms(module: str, repeats: int) -> Tuple[float, Dict[str, int]]:
+    """Best-of-N cumulative import time of module, plus the imports of the last run"""
+    best = float('inf')
+    for _ in range(repeats):
+        rows = import_times(module)
+        cumulative = {name: cum for name, _, cum in rows}
+        best = min(best, cumulative[module] / 1000)
+    return best, cumulative
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='modeling.predict')
+    parser.add_argument('--budget-ms', type=float, default=75.0)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    elapsed_ms, imported = best_cumulative_ms(args.module, args.repeats)
+    heavy = [dep for dep in LAZY_DEPENDENCIES if dep in imported]
+
+    print(f"{args.module}: {elapsed_ms:.1f} ms cumulative (budget {args.budget_ms:.1f} ms)")
+    print("Slowest imports:")
+    for name, cum in sorted(imported.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {cum / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if elapsed_ms > args.budget_ms:
+        failures.append(f"import time {elapsed_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+    if heavy:
+        failures.append(f"eagerly imports {', '.join(heavy)}")
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
@@ -0,0 +1,107 @@
+"""Accuracy vs throughput of the high-throughput scoring modes for every UPDRS target.
+
+Usage:
+    python benchmarks/inference_throughput_benchmark.py [--rows 200000] [--data enriched_clinical.parquet]
+
+Each target is scored with the exact path (float64 DataFrame, all trees) and
+with float32 block-wise scoring at several tree cutoffs: all trees, the
+trainer's best/fast iterations and fixed fractions of the ensemble. Accuracy
+is reported against the exact predictions and, when --data holds the target
+columns, against the observed scores.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from modeling.eval.metrics import clinical_smape
+from modeling.fast_inference import HighThroughputScorer, fast_predict, load_inference_meta
+from modeling.trainer import MODEL_DIR, encode_categoricals
+
+FRACTIONS = [0.25, 0.5, 0.75]
+
+def synthetic_features(booster, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Rows drawn around the model's own split thresholds, where float32 rounding can flip a split"""
+    rng = np.random.default_rng(seed)
+    splits = booster.trees_to_dataframe().dropna(subset=['split_feature'])
+    columns = {}
+    for feature in booster.feature_name():
+        thresholds = splits.loc[splits['split_feature'] == feature, 'threshold'].to_numpy(dtype=np.float64)
+        if len(thresholds) == 0:
+            columns[feature] = rng.normal(size=n_rows)
+            continue
+        spread = max(np.ptp(thresholds), 1.0)
+        columns[feature] = rng.choice(thresholds, n_rows) + rng.normal(scale=0.05 * spread, size=n_rows)
+    return pd.DataFrame(columns)
+
+def best_of(func, repeats: int = 3) -> float:
+    """Best wall time in seconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def operating_points(booster, meta: dict) -> Dict[str, Optional[int]]:
+    """Named tree cutoffs to compare for one booster"""
+    n_trees = booster.num_trees()
+    points = {'float32 all trees': None}
+    for name in ['best', 'fast']:
+        if f'{name}_iteration' in meta:
+            points[f'float32 {name} ({meta[name + "_iteration"]} trees)'] = meta[f'{name}_iteration']
+    for fraction in FRACTIONS:
+        trees = max(1, int(round(fraction * n_trees)))
+        points[f'float32 {fraction:.0%} ({trees} trees)'] = trees
+    return points
+
+def run(n_rows: int, data_path: Optional[Path] = None, block_rows: Optional[int] = None) -> pd.DataFrame:
+    scorer = HighThroughputScorer(iteration=None, block_rows=block_rows)
+    # Codes are taken over the whole file, as in training, before any sampling
+    data = encode_categoricals(pd.read_parquet(data_path)) if data_path is not None else None
+    rows = []
+    for target, booster in scorer.models.items():
+        if data is not None:
+            sample = data.sample(n_rows, replace=True, random_state=0).reset_index(drop=True)
+            truth = sample[target].to_numpy(dtype=np.float64) if target in sample.columns else None
+            features = sample[booster.feature_name()].astype(np.float64)
+        else:
+            features, truth = synthetic_features(booster, n_rows), None
+
+        exact = booster.predict(features)
+        exact_seconds = best_of(lambda: booster.predict(features))
+        points = {'exact float64': (exact_seconds, exact)}
+        meta = load_inference_meta(MODEL_DIR / target)
+        for name, trees in operating_points(booster, meta).items():
+            seconds = best_of(lambda: fast_predict(booster, features, trees, block_rows))
+            points[name] = (seconds, fast_predict(booster, features, trees, block_rows))
+
+        for name, (seconds, predictions) in points.items():
+            row = {
+                'target': target,
+                'mode': name,
+                'rows_per_s': n_rows / seconds,
+                'speedup': exact_seconds / seconds,
+                'max_abs_diff': float(np.max(np.abs(predictions - exact))),
+                'smape_vs_exact': clinical_smape(exact, predictions, target),
+            }
+            if truth is not None:
+                row['smape_vs_truth'] = clinical_smape(truth, predictions, target)
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--data', type=Path, default=None,
+                        help='Parquet file with the model features (and optionally the targets)')
+    parser.add_argument('--block-rows', type=int, default=None)
+    args = parser.parse_args()
+
+    results = run(args.rows, args.data, args.block_rows)
+    with pd.option_context('display.width', 160):
+        print(results.to_string(index=False, float_format='%.4g'))
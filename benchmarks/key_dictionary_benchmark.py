@@ -0,0 +1,68 @@
+"""Merge time on per-file categorical keys vs keys encoded with one shared KeyDictionary.
+
+Usage:
+    python benchmarks/key_dictionary_benchmark.py [--rows 1000000] [--keys 200000]
+
+'per-file categories' is what independent read_csv(dtype='category') calls
+produce; 'shared dictionary' is what the loaders produce now that every raw
+file is re-encoded with one KeyDictionary.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.key_dictionary import KeyDictionary
+
+def make_frames(n_rows: int, n_keys: int, seed: int = 0):
+    """Many-to-one left/right tables keyed on visit_id strings"""
+    rng = np.random.default_rng(seed)
+    key_values = np.array([f'{k}_{k % 17 * 6}' for k in range(n_keys)], dtype=object)
+    left = pd.DataFrame({
+        'visit_id': pd.Categorical(key_values[rng.integers(0, n_keys, n_rows)]),
+        'NPX': rng.lognormal(10, 1, n_rows).astype('float32'),
+    })
+    # The lookup table misses some keys and has a few of its own
+    right_keys = np.concatenate([key_values[rng.random(n_keys) < 0.9], [f'extra_{k}' for k in range(1000)]])
+    right = pd.DataFrame({
+        'visit_id': pd.Categorical(right_keys),
+        'prot_O00391': rng.normal(size=len(right_keys)).astype('float32'),
+    })
+    return left, right
+
+def best_of(func, repeats: int = 3) -> float:
+    """Best wall time in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return 1000 * min(timings)
+
+def run(n_rows: int, n_keys: int) -> pd.DataFrame:
+    left, right = make_frames(n_rows, n_keys)
+    keys = KeyDictionary().fit(left, right)
+    shared_left, shared_right = keys.encode(left.copy()), keys.encode(right.copy())
+
+    expected = left.merge(right, on='visit_id', how='left')
+    result = shared_left.merge(shared_right, on='visit_id', how='left')
+    np.testing.assert_array_equal(expected['prot_O00391'].to_numpy(), result['prot_O00391'].to_numpy())
+
+    rows = [
+        {'keys': 'per-file categories', 'merge_ms': best_of(lambda: left.merge(right, on='visit_id', how='left')),
+         'result_mb': expected.memory_usage(deep=True).sum() / 1024**2},
+        {'keys': 'shared dictionary', 'merge_ms': best_of(lambda: shared_left.merge(shared_right, on='visit_id', how='left')),
+         'result_mb': result.memory_usage(deep=True).sum() / 1024**2},
+    ]
+    return pd.DataFrame(rows)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--keys', type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(run(args.rows, args.keys).to_string(index=False, float_format='%.1f'))
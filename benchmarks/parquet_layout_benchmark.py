@@ -0,0 +1,105 @@
+"""Read-time comparison: default pandas Parquet vs the write_processed layout.
+
+Usage:
+    python benchmarks/parquet_layout_benchmark.py [--patients 2000] [--proteins 300]
+
+The layout file has one row group per patient hash bucket (sized by
+write_processed), so per-patient reads skip other buckets; month and full
+reads scan every bucket and restore the (patient_id, visit_month) order.
+Exits non-zero when the layout is not the fastest option for a query.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.parquet_layout import write_processed
+from src.processed_dataset import ProcessedDataset
+
+VISIT_MONTHS = [0, 6, 12, 18, 24, 36, 48, 60, 72, 84, 96, 108]
+
+def make_cohort(n_patients: int, n_proteins: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic wide protein table shaped like protein_features.parquet"""
+    rng = np.random.default_rng(seed)
+    patient_ids = np.repeat(np.arange(n_patients), len(VISIT_MONTHS)).astype(str)
+    visit_months = np.tile(VISIT_MONTHS, n_patients).astype('int16')
+    df = pd.DataFrame({
+        'visit_id': pd.Series(patient_ids).str.cat(visit_months.astype(str), sep='_'),
+        'patient_id': pd.Categorical(patient_ids),
+        'visit_month': visit_months,
+    })
+    npx = rng.lognormal(10, 1, size=(len(df), n_proteins)).astype('float32')
+    npx_cols = pd.DataFrame(npx, columns=[f'NPX_P{i:05d}' for i in range(n_proteins)])
+    # Shuffle so the monolithic file has no useful order, as written today
+    return pd.concat([df, npx_cols], axis=1).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+def best_of(func, repeats: int = 5) -> float:
+    """Best wall time in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return 1000 * min(timings)
+
+def _filter_patients(df: pd.DataFrame, patients: list) -> pd.DataFrame:
+    return df[df['patient_id'].isin(patients)]
+
+def _filter_months(df: pd.DataFrame, start: int, end: int) -> pd.DataFrame:
+    return df[df['visit_month'].between(start, end)]
+
+def run(n_patients: int, n_proteins: int) -> pd.DataFrame:
+    df = make_cohort(n_patients, n_proteins)
+    patients = [str(pid) for pid in np.random.default_rng(1).choice(n_patients, 5, replace=False)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monolithic = Path(tmp_dir) / 'monolithic.parquet'
+        layout = Path(tmp_dir) / 'layout.parquet'
+        df.to_parquet(monolithic)
+        write_processed(df, layout)
+
+        queries = {
+            'per-patient (5 patients)': (
+                lambda: _filter_patients(pd.read_parquet(monolithic), patients),
+                lambda: ProcessedDataset(monolithic).where_patients(patients).to_pandas(),
+                lambda: ProcessedDataset(layout).where_patients(patients).to_pandas(),
+            ),
+            'per-month (months 0-12)': (
+                lambda: _filter_months(pd.read_parquet(monolithic), 0, 12),
+                lambda: ProcessedDataset(monolithic).where_months(0, 12).to_pandas(),
+                lambda: ProcessedDataset(layout).where_months(0, 12).to_pandas(),
+            ),
+            'full read (trainer/temporal)': (
+                lambda: pd.read_parquet(monolithic),
+                lambda: ProcessedDataset(monolithic).to_pandas(),
+                lambda: ProcessedDataset(layout).to_pandas(),
+            ),
+        }
+        rows = []
+        for query, (full_scan, pushdown, layout_read) in queries.items():
+            rows.append({
+                'query': query,
+                'read_then_filter_ms': best_of(full_scan),
+                'pushdown_monolithic_ms': best_of(pushdown),
+                'pushdown_layout_ms': best_of(layout_read),
+            })
+    return pd.DataFrame(rows)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=2000)
+    parser.add_argument('--proteins', type=int, default=300)
+    args = parser.parse_args()
+
+    results = run(args.patients, args.proteins)
+    print(results.to_string(index=False, float_format='%.1f'))
+    baseline = results[['read_then_filter_ms', 'pushdown_monolithic_ms']].min(axis=1)
+    slower = results.loc[results['pushdown_layout_ms'] >= baseline, 'query'].tolist()
+    if slower:
+        print(f"FAIL: layout is not faster for: {', '.join(slower)}")
+        sys.exit(1)
+    print("OK")
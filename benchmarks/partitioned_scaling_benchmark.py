@@ -0,0 +1,95 @@
+"""Wall time of the sharded feature stages against the single-process path.
+
+Usage:
+    python benchmarks/partitioned_scaling_benchmark.py [--patients 20000] [--proteins 200] [--jobs 1 2 4 8]
+
+n_jobs=1 calls the stage function directly; larger values go through
+run_partitioned. Speedup is relative to n_jobs=1 and can only approach
+n_jobs when the machine has that many free cores (reported as cpu_count).
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from features.biomarker_features import create_biomarker_features
+from features.clinical_enricher import _adjust_medication_effect, _add_temporal_features
+from features.partitioned import run_partitioned
+from features.temporal_features import build_temporal_features
+
+VISIT_MONTHS = [0, 6, 12, 18, 24, 36, 48, 60, 72, 84, 96, 108]
+
+def make_cohort(n_patients: int, n_proteins: int, seed: int = 0):
+    """Synthetic clinical visits and a wide NPX table shaped like the processed artifacts"""
+    rng = np.random.default_rng(seed)
+    patient_ids = np.repeat(np.arange(n_patients), len(VISIT_MONTHS)).astype(str)
+    clinical = pd.DataFrame({
+        'visit_id': pd.Series(patient_ids).str.cat(np.tile(VISIT_MONTHS, n_patients).astype(str), sep='_'),
+        'patient_id': pd.Categorical(patient_ids),
+        'visit_month': np.tile(VISIT_MONTHS, n_patients).astype('int8'),
+        'on_medication': rng.integers(0, 2, len(patient_ids)).astype('int8'),
+    })
+    for target in ['updrs_1', 'updrs_2', 'updrs_3', 'updrs_4']:
+        clinical[target] = rng.integers(0, 60, len(clinical)).astype('float32')
+    clinical = _adjust_medication_effect(clinical.sample(frac=1, random_state=seed).reset_index(drop=True))
+
+    proteins = clinical[['patient_id', 'visit_month']].copy()
+    npx = rng.lognormal(10, 1, size=(len(proteins), n_proteins)).astype('float32')
+    proteins = pd.concat([proteins, pd.DataFrame(npx, columns=[f'NPX_P{i:05d}' for i in range(n_proteins)])], axis=1)
+
+    biomarkers = clinical.sort_values(['patient_id', 'visit_month']).reset_index(drop=True)
+    for column in ['O00391', 'P05067', 'Q9Y6K9_delta']:
+        biomarkers[column] = rng.normal(size=len(biomarkers)).astype('float32')
+    return clinical, proteins, biomarkers
+
+def timed(func) -> float:
+    """Wall time in seconds of a single call"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def run(n_patients: int, n_proteins: int, jobs: list) -> pd.DataFrame:
+    clinical, proteins, biomarkers = make_cohort(n_patients, n_proteins)
+    stages = {
+        'clinical': (
+            lambda: _add_temporal_features(clinical.copy()),
+            lambda n: run_partitioned('clinical', {'df': clinical.copy()}, n_jobs=n),
+        ),
+        'temporal': (
+            lambda: build_temporal_features(clinical.copy(), proteins.copy()),
+            lambda n: run_partitioned('temporal', {'clinical': clinical.copy(), 'protein_features': proteins.copy()},
+                                      n_jobs=n),
+        ),
+        'biomarker': (
+            lambda: create_biomarker_features(biomarkers.copy()),
+            lambda n: run_partitioned('biomarker', {'df': biomarkers.copy()}, n_jobs=n),
+        ),
+    }
+    rows = []
+    for stage, (single, sharded) in stages.items():
+        baseline = timed(single)
+        for n_jobs in jobs:
+            seconds = baseline if n_jobs == 1 else timed(lambda: sharded(n_jobs))
+            rows.append({
+                'stage': stage,
+                'n_jobs': n_jobs,
+                'seconds': seconds,
+                'speedup': baseline / seconds,
+                'efficiency': baseline / seconds / n_jobs,
+            })
+    return pd.DataFrame(rows)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=20_000)
+    parser.add_argument('--proteins', type=int, default=200)
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f"cpu_count: {os.cpu_count()}")
+    results = run(args.patients, args.proteins, args.jobs)
+    print(results.to_string(index=False, float_format='%.2f'))
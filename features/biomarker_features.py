@@ -1,23 +1,29 @@
 from typing import Dict
 import pandas as pd
+from features.partitioned import run_partitioned
+from src.dtype_planner import enforce_feature_dtypes
 
 TOP_BIOMARKERS = ['O00391', 'P05067']  # Q9Y6K9 removed - no measurements
 
-def create_biomarker_features(df: pd.DataFrame) -> pd.DataFrame:
+def create_biomarker_features(df: pd.DataFrame, n_jobs: int = 1) -> pd.DataFrame:
     """
     Create predictive features from top biomarkers.
     
     Args:
         df: Merged clinical and protein DataFrame
+        n_jobs: Worker processes; above 1 the patients are sharded across a pool
         
     Returns:
         DataFrame with engineered features
     """
+    if n_jobs != 1:
+        return run_partitioned('biomarker', {'df': df}, n_jobs=n_jobs)
+    
     # Rate-of-change features
     for prot in TOP_BIOMARKERS:
         df[f'{prot}_delta'] = (
-            df.groupby('patient_id')[prot].diff() / 
-            df.groupby('patient_id')['visit_month'].diff()
+            df.groupby('patient_id', observed=True)[prot].diff() / 
+            df.groupby('patient_id', observed=True)['visit_month'].diff()
         )
     
     # Medication interaction terms
@@ -26,7 +32,7 @@ def create_biomarker_features(df: pd.DataFrame) -> pd.DataFrame:
     
     # Cumulative exposure
     for prot in TOP_BIOMARKERS:
-        df[f'{prot}_cumulative'] = df.groupby('patient_id')[prot].cumsum()
+        df[f'{prot}_cumulative'] = df.groupby('patient_id', observed=True)[prot].cumsum()
     
     # Clinical impact score
     df['biomarker_impact_score'] = (
@@ -35,7 +41,7 @@ def create_biomarker_features(df: pd.DataFrame) -> pd.DataFrame:
         0.35 * df['Q9Y6K9_delta'].fillna(0)
     )
     
-    return df
+    return enforce_feature_dtypes(df)
 
 def get_feature_descriptions() -> Dict[str, str]:
     """Return descriptions of all engineered features."""
@@ -2,28 +2,43 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from src.data_loader import load_clinical_data, load_proteins
+from src.parquet_layout import write_processed
+from src.dtype_planner import MemoryBudget, enforce_feature_dtypes, estimate_frame_mb, frame_memory_mb
 from config import PROCESSED_DIR, TARGETS
+from features.partitioned import run_partitioned
 
-def enrich_features(base_path: str) -> None:
-    """Core clinical enrichment pipeline"""
+def enrich_features(base_path: str, n_jobs: int = 1, memory_budget_mb: float = None) -> None:
+    """Core clinical enrichment pipeline (n_jobs > 1 shards patients across processes)"""
     base_path = Path(base_path)
+    budget = MemoryBudget(memory_budget_mb)
     
-    # Load datasets
+    # Load datasets (key columns share one dictionary, so merges compare codes)
     clinical = load_clinical_data(base_path)
     proteins = load_proteins(base_path)
+    budget.track('load', clinical, proteins)
     
     # Step 1: Medication-adjusted targets
     clinical = _adjust_medication_effect(clinical)
     
-    # Step 2: Temporal feature engineering
-    clinical = _add_temporal_features(clinical)
+    # Step 2: Temporal feature engineering (per patient, so it can be sharded)
+    if n_jobs == 1:
+        clinical = _add_temporal_features(clinical)
+    else:
+        clinical = run_partitioned('clinical', {'df': clinical}, n_jobs=n_jobs)
+    budget.track('temporal_features', clinical, proteins)
     
-    # Step 3: Protein merge with biomarker focus
+    # Step 3: Protein merge with biomarker focus; fail before the pivot if
+    # the wide protein table and the merged copy of clinical cannot fit
+    pivot_mb = estimate_frame_mb(proteins['visit_id'].nunique(), proteins['UniProt'].nunique())
+    merge_mb = frame_memory_mb(clinical) + estimate_frame_mb(len(clinical), 6)
+    budget.reserve('protein_merge', pivot_mb + merge_mb, clinical, proteins)
     enriched = _merge_protein_features(clinical, proteins)
+    budget.track('protein_merge', enriched, proteins)
     
     # Step 4: Save processed data
-    enriched.to_parquet(base_path / PROCESSED_DIR / "enriched_clinical.parquet")
+    write_processed(enriched, base_path / PROCESSED_DIR / "enriched_clinical.parquet")
     print(f"✅ Enriched data saved: {base_path / PROCESSED_DIR}")
+    print(budget.report().to_string(index=False))
 
 def _adjust_medication_effect(df: pd.DataFrame) -> pd.DataFrame:
     """Create medication-adjusted UPDRS3 target"""
@@ -40,12 +55,12 @@ def _add_temporal_features(df: pd.DataFrame) -> pd.DataFrame:
     
     # Rate of change features
     for target in TARGETS:
-        df[f'{target}_delta'] = df.groupby('patient_id')[target].diff() / \
-                                df.groupby('patient_id')['visit_month'].diff()
+        df[f'{target}_delta'] = df.groupby('patient_id', observed=True)[target].diff() / \
+                                df.groupby('patient_id', observed=True)['visit_month'].diff()
     
     # Visit gap features
-    df['visit_gap'] = df.groupby('patient_id')['visit_month'].diff().fillna(0)
-    df['months_since_first'] = df['visit_month'] - df.groupby('patient_id')['visit_month'].transform('min')
+    df['visit_gap'] = df.groupby('patient_id', observed=True)['visit_month'].diff().fillna(0)
+    df['months_since_first'] = df['visit_month'] - df.groupby('patient_id', observed=True)['visit_month'].transform('min')
     
     # Progression stage classification
     conditions = [
@@ -57,11 +72,11 @@ def _add_temporal_features(df: pd.DataFrame) -> pd.DataFrame:
     df['disease_stage'] = np.select(conditions, choices, default='unknown')
 
     # Medication response metric
-    df['med_response'] = df.groupby('patient_id').apply(
+    df['med_response'] = df.groupby('patient_id', observed=True).apply(
         lambda x: x['updrs_3_adj'].diff() / x['visit_month'].diff()
     ).reset_index(level=0, drop=True)
     
-    return df
+    return enforce_feature_dtypes(df)
 
 def _merge_protein_features(clinical: pd.DataFrame, proteins: pd.DataFrame) -> pd.DataFrame:
     """Merge proteins with clinical data, focusing on biomarkers"""
@@ -70,7 +85,8 @@ def _merge_protein_features(clinical: pd.DataFrame, proteins: pd.DataFrame) -> p
         index='visit_id', 
         columns='UniProt', 
         values='NPX',
-        aggfunc='mean'
+        aggfunc='mean',
+        observed=True
     ).add_prefix('prot_')
     
     # Focus on top biomarkers
@@ -85,13 +101,13 @@ def _merge_protein_features(clinical: pd.DataFrame, proteins: pd.DataFrame) -> p
     
     # Merge with clinical data
     merged = clinical.merge(
-        protein_wide[biomarker_cols], 
-        on='visit_id', 
+        protein_wide[biomarker_cols].reset_index(),
+        on='visit_id',
         how='left'
     )
     
     # Add biomarker change features
     for prot in TOP_BIOMARKERS:
-        merged[f'prot_{prot}_delta'] = merged.groupby('patient_id')[f'prot_{prot}'].diff()
+        merged[f'prot_{prot}_delta'] = merged.groupby('patient_id', observed=True)[f'prot_{prot}'].diff()
     
-    return merged
\ No newline at end of file
+    return enforce_feature_dtypes(merged)
\ No newline at end of file
@@ -0,0 +1,160 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+from scipy import stats
+from src.key_dictionary import KeyDictionary
+
+DEFAULT_TARGETS = ['updrs_1', 'updrs_2', 'updrs_3', 'updrs_4']
+
+def visit_protein_matrix(
+    clinical: pd.DataFrame,
+    proteins: pd.DataFrame,
+    targets: Sequence[str],
+    group_cols: Sequence[str] = ('patient_id',)
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, pd.Index]:
+    """
+    Lay out proteins and targets on one row per clinical visit.
+
+    Rows are sorted by group_cols then visit_month, so each patient (group)
+    occupies a contiguous block and shifting rows moves between visits.
+
+    Returns:
+        X: visits x proteins NPX matrix (NaN where not measured)
+        Y: visits x targets matrix
+        groups: group id of each row
+        protein_ids: UniProt id of each X column
+    """
+    group_cols = list(group_cols)
+    visits = clinical[['visit_id', 'visit_month', *group_cols, *targets]].copy()
+    measurements = proteins[['visit_id', 'UniProt', 'NPX']].copy()
+    keys = KeyDictionary().fit(visits, measurements)
+    visits = keys.encode(visits).sort_values(group_cols + ['visit_month']).reset_index(drop=True)
+    measurements = keys.encode(measurements)
+
+    # Scatter NPX values into the dense matrix through the shared codes
+    row_of_visit = np.full(len(keys.categories['visit_id']), -1, dtype=np.int64)
+    row_of_visit[keys.codes(visits, 'visit_id')] = np.arange(len(visits))
+    rows = row_of_visit[keys.codes(measurements, 'visit_id')]
+    cols = keys.codes(measurements, 'UniProt')
+    keep = (rows >= 0) & (cols >= 0)
+    X = np.full((len(visits), len(keys.categories['UniProt'])), np.nan)
+    X[rows[keep], cols[keep]] = measurements['NPX'].to_numpy(dtype=np.float64)[keep]
+
+    measured = ~np.isnan(X).all(axis=0)
+    Y = visits[list(targets)].to_numpy(dtype=np.float64)
+    groups = visits.groupby(group_cols, sort=False, observed=True).ngroup().to_numpy()
+    return X[:, measured], Y, groups, keys.categories['UniProt'][measured]
+
+def shift_within_groups(values: np.ndarray, groups: np.ndarray, periods: int) -> np.ndarray:
+    """Row i gets row i + periods when both rows are in the same group, else NaN"""
+    shifted = np.full(values.shape, np.nan)
+    source = np.arange(len(values)) + periods
+    valid = (source >= 0) & (source < len(values))
+    valid[valid] = groups[source[valid]] == groups[valid]
+    shifted[valid] = values[source[valid]]
+    return shifted
+
+def pairwise_pearson(X: np.ndarray, Y: np.ndarray, min_samples: int = 10):
+    """
+    Pearson r, two-sided p-value and n for every (X column, Y column) pair.
+
+    Each pair uses only rows where both values are present, matching
+    scipy.stats.pearsonr on the pairwise-complete data, but all pairs are
+    computed with a handful of matrix products.
+    """
+    mask_x = ~np.isnan(X)
+    mask_y = ~np.isnan(Y)
+    mx = mask_x.astype(np.float64)
+    my = mask_y.astype(np.float64)
+    x0 = np.where(mask_x, X, 0.0)
+    y0 = np.where(mask_y, Y, 0.0)
+    # Centre on column means first; NPX runs to 1e7, so raw sums of squares
+    # would lose most of their precision to cancellation
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x0 = np.where(mask_x, x0 - np.nan_to_num(x0.sum(axis=0) / mx.sum(axis=0)), 0.0)
+        y0 = np.where(mask_y, y0 - np.nan_to_num(y0.sum(axis=0) / my.sum(axis=0)), 0.0)
+
+    n = mx.T @ my
+    sum_x = x0.T @ my
+    sum_y = mx.T @ y0
+    sum_xx = (x0 ** 2).T @ my
+    sum_yy = mx.T @ (y0 ** 2)
+    sum_xy = x0.T @ y0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = n * sum_xy - sum_x * sum_y
+        var = (n * sum_xx - sum_x ** 2) * (n * sum_yy - sum_y ** 2)
+        r = np.clip(cov / np.sqrt(var), -1.0, 1.0)
+        dof = n - 2
+        t_stat = r * np.sqrt(dof / (1.0 - r ** 2))
+        p_value = 2 * stats.t.sf(np.abs(t_stat), dof)
+    too_few = n < min_samples
+    r[too_few] = np.nan
+    p_value[too_few] = np.nan
+    return r, p_value, n.astype(np.int64)
+
+def _cache_key(clinical: pd.DataFrame, proteins: pd.DataFrame, params: tuple) -> str:
+    digest = hashlib.sha1(repr(params).encode())
+    digest.update(pd.util.hash_pandas_object(proteins[['visit_id', 'UniProt', 'NPX']], index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(clinical, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def lead_lag_correlations(
+    clinical: pd.DataFrame,
+    proteins: pd.DataFrame,
+    targets: Sequence[str] = DEFAULT_TARGETS,
+    max_lag: int = 2,
+    group_cols: Sequence[str] = ('patient_id',),
+    min_samples: int = 10,
+    cache_dir: Optional[Path] = None
+) -> pd.DataFrame:
+    """
+    Correlate every protein with every target at lags -max_lag..+max_lag visits.
+
+    A positive lag k pairs the protein at visit t with the target at visit t+k
+    of the same patient (the protein leads); negative lags pair it with
+    earlier visits.
+
+    Args:
+        clinical: Clinical visits with visit_id, visit_month, group_cols and targets
+        proteins: Long protein table with visit_id, UniProt and NPX
+        targets: Target columns to correlate against
+        max_lag: Largest lead/lag in visits
+        group_cols: Columns whose combination defines one visit sequence
+        min_samples: Pairs with fewer complete rows get NaN statistics
+        cache_dir: If given, results are cached there keyed by inputs and params
+
+    Returns:
+        Long DataFrame with protein, target, lag, correlation, p_value, n_samples
+    """
+    targets = list(targets)
+    clinical = clinical[['visit_id', 'visit_month', *group_cols, *targets]]
+    params = (tuple(targets), max_lag, tuple(group_cols), min_samples)
+
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = Path(cache_dir) / f"lead_lag_{_cache_key(clinical, proteins, params)}.parquet"
+        if cache_path.exists():
+            return pd.read_parquet(cache_path)
+
+    X, Y, groups, protein_ids = visit_protein_matrix(clinical, proteins, targets, group_cols)
+
+    frames: List[pd.DataFrame] = []
+    for lag in range(-max_lag, max_lag + 1):
+        r, p_value, n = pairwise_pearson(X, shift_within_groups(Y, groups, lag), min_samples)
+        frames.append(pd.DataFrame({
+            'protein': np.repeat(protein_ids.to_numpy(), len(targets)),
+            'target': np.tile(targets, len(protein_ids)),
+            'lag': lag,
+            'correlation': r.ravel(),
+            'p_value': p_value.ravel(),
+            'n_samples': n.ravel(),
+        }))
+    results = pd.concat(frames, ignore_index=True)
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        results.to_parquet(cache_path)
+    return results
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from src.parquet_layout import SORT_KEYS, patient_bucket
+
+ROW_COL = '_partition_row'
+
+class Stage(NamedTuple):
+    """Per-patient transform that can run independently on each shard"""
+    target: str          # "module:function", resolved inside the worker
+    sorts: bool          # transform sorts rows by SORT_KEYS
+    resets_index: bool   # transform merges, so output gets a fresh RangeIndex
+
+# Stages are resolved by dotted path so the enrichers can import this module
+# without creating an import cycle.
+STAGES = {
+    'clinical': Stage('features.clinical_enricher:_add_temporal_features', True, False),
+    'temporal': Stage('features.temporal_features:build_temporal_features', True, True),
+    'biomarker': Stage('features.biomarker_features:create_biomarker_features', False, False),
+}
+
+def _write_ipc(df: pd.DataFrame, path: Path) -> None:
+    """Write a DataFrame as an Arrow IPC file"""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    with pa.OSFile(str(path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+def _read_ipc(path: Path) -> pd.DataFrame:
+    """Memory-map an Arrow IPC file back into a DataFrame"""
+    with pa.memory_map(str(path), 'r') as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+def _run_shard(stage_name: str, input_paths: Dict[str, str], output_path: str) -> str:
+    """Worker entry point: read shard frames, apply the stage, write the result"""
+    module_name, func_name = STAGES[stage_name].target.split(':')
+    func = getattr(importlib.import_module(module_name), func_name)
+    frames = {name: _read_ipc(Path(path)) for name, path in input_paths.items()}
+    result = func(**frames)
+    _write_ipc(result, Path(output_path))
+    return output_path
+
+def run_partitioned(
+    stage_name: str,
+    frames: Dict[str, pd.DataFrame],
+    n_jobs: Optional[int] = None,
+    n_shards: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Run a per-patient feature stage on hash-partitioned shards in a process pool.
+
+    Args:
+        stage_name: Key into STAGES ('clinical', 'temporal' or 'biomarker')
+        frames: Keyword arguments of the stage function; the first frame drives
+            the output row order and every frame must carry patient_id
+        n_jobs: Worker processes (defaults to all cores)
+        n_shards: Number of patient shards (defaults to n_jobs)
+
+    Returns:
+        The same DataFrame the stage produces in a single process
+    """
+    stage = STAGES[stage_name]
+    n_jobs = n_jobs or os.cpu_count() or 1
+    n_shards = n_shards or n_jobs
+
+    primary_name = next(iter(frames))
+    primary = frames[primary_name]
+    if stage.sorts:
+        primary = primary.sort_values(SORT_KEYS)
+    # Global row position lets shards be stitched back deterministically
+    primary = primary.assign(**{ROW_COL: np.arange(len(primary))})
+    frames = {**frames, primary_name: primary}
+
+    shard_ids = {name: patient_bucket(df['patient_id'], n_shards) for name, df in frames.items()}
+
+    with tempfile.TemporaryDirectory(prefix='amp_shards_') as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        jobs = []
+        for shard in range(n_shards):
+            if not (shard_ids[primary_name] == shard).any():
+                continue
+            input_paths = {}
+            for name, df in frames.items():
+                path = tmp_dir / f'{name}_{shard}.arrow'
+                _write_ipc(df[shard_ids[name] == shard], path)
+                input_paths[name] = str(path)
+            jobs.append((input_paths, str(tmp_dir / f'out_{shard}.arrow')))
+
+        if n_jobs == 1:
+            output_paths = [_run_shard(stage_name, inputs, out) for inputs, out in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                futures = [pool.submit(_run_shard, stage_name, inputs, out) for inputs, out in jobs]
+                output_paths = [future.result() for future in futures]
+
+        parts: List[pd.DataFrame] = [_read_ipc(Path(path)) for path in output_paths]
+
+    result = pd.concat(parts).sort_values(ROW_COL, kind='stable').drop(columns=ROW_COL)
+    if stage.resets_index:
+        result = result.reset_index(drop=True)
+    return result
@@ -7,17 +7,20 @@ from src.data_loader import load_clinical_data, load_peptides, load_proteins
 from .protein_processor import create_protein_features
 from .temporal_features import create_all_temporal_features
 from src.data_loader import load_clinical_data, load_peptides, load_proteins
+from src.parquet_layout import write_processed
+from src.dtype_planner import MemoryBudget, estimate_frame_mb
 
 class FeaturePipeline:
-    def __init__(self, base_path: str):
+    def __init__(self, base_path: str, memory_budget_mb: float = None):
         self.base_path = Path(base_path)
         self.artifacts = {}
+        self.budget = MemoryBudget(memory_budget_mb)
         
     def run_clinical_pipeline(self) -> pd.DataFrame:
         """Run complete clinical data processing"""
         enricher = ClinicalDataEnricher(self.base_path)
         clinical = enricher.process()
-        clinical = create_all_temporal_features(self.base_path)
+        clinical = create_all_temporal_features(self.base_path, budget=self.budget)
         self.artifacts['clinical'] = clinical
         return clinical
         
@@ -31,10 +34,14 @@ class FeaturePipeline:
         """Combine all feature sets"""
         clinical = self.artifacts.get('clinical', self.run_clinical_pipeline())
         proteins = self.artifacts.get('proteins', self.run_protein_pipeline())
+        # One row per clinical visit with the visit means and patient mean/std of every protein column
+        protein_cols = proteins.select_dtypes('number').shape[1]
+        self.budget.reserve('merged_features', estimate_frame_mb(len(clinical), clinical.shape[1] + 3 * protein_cols),
+                            clinical, proteins)
         
-        # Merge on visit_id
+        # Merge on visit_id (loader keys share one dictionary, so this compares codes)
         features = clinical.merge(
-            proteins.groupby('visit_id').mean(),
+            proteins.groupby('visit_id').mean().reset_index(),
             on='visit_id',
             how='left'
         )
@@ -43,11 +50,12 @@ class FeaturePipeline:
         patient_features = proteins.groupby('patient_id').agg(['mean', 'std'])
         patient_features.columns = ['_'.join(col) for col in patient_features.columns]
         features = features.merge(
-            patient_features,
+            patient_features.reset_index(),
             on='patient_id',
             how='left'
         )
         
+        self.budget.track('merged_features', features)
         self.artifacts['features'] = features
         return features
 
@@ -58,6 +66,6 @@ class FeaturePipeline:
         features = self.merge_features()
         
         if save_path:
-            features.to_parquet(Path(save_path) / 'processed_features.parquet')
+            write_processed(features, Path(save_path) / 'processed_features.parquet')
             
         return features
\ No newline at end of file
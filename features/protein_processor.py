@@ -2,6 +2,8 @@ import pandas as pd
 from pathlib import Path
 from typing import Tuple
 from src.data_loader import load_proteins, load_peptides
+from src.parquet_layout import write_processed
+from src.dtype_planner import MemoryBudget, enforce_feature_dtypes, estimate_frame_mb, frame_memory_mb
 
 def aggregate_peptides_to_proteins(base_path: Path) -> pd.DataFrame:
     """Aggregate peptide abundances to protein-level measurements"""
@@ -35,7 +37,7 @@ def create_protein_features(base_path: Path) -> Tuple[pd.DataFrame, pd.DataFrame
     proteins = load_proteins(base_path)
     peptide_aggregates = aggregate_peptides_to_proteins(base_path)
     
-    # Combine with existing protein measurements
+    # Combine with existing protein measurements (loader keys share one dictionary)
     combined = proteins.merge(
         peptide_aggregates,
         on=['visit_id', 'UniProt'],
@@ -53,10 +55,11 @@ def create_protein_features(base_path: Path) -> Tuple[pd.DataFrame, pd.DataFrame
     
     return combined, proteins
 
-def process_proteins(base_path: str) -> None:
+def process_proteins(base_path: str, memory_budget_mb: float = None) -> None:
     """Process and save protein features to parquet"""
     # Convert to Path object
     base_path = Path(base_path)
+    budget = MemoryBudget(memory_budget_mb)
     
     # Create processed directory if it doesn't exist
     processed_dir = base_path / "data" / "processed"
@@ -64,8 +67,11 @@ def process_proteins(base_path: str) -> None:
     
     # Generate and save protein features
     protein_features, _ = create_protein_features(base_path)
+    budget.track('protein_features', protein_features)
     
-    # Pivot to wide format (UniProt IDs as columns)
+    # Pivot to wide format (UniProt IDs as columns), checked against the budget first
+    budget.reserve('pivot', estimate_frame_mb(protein_features['visit_id'].nunique(),
+                                              protein_features['UniProt'].nunique()), protein_features)
     wide_features = protein_features.pivot(
         index=['visit_id'],
         columns='UniProt',
@@ -74,15 +80,19 @@ def process_proteins(base_path: str) -> None:
     
     # Merge with visit metadata
     peptides = load_peptides(base_path)
+    budget.reserve('visit_merge', frame_memory_mb(wide_features), wide_features, peptides)
     wide_features = wide_features.merge(
         peptides[['visit_id', 'patient_id', 'visit_month']].drop_duplicates(),
         on='visit_id'
     )
+    wide_features = enforce_feature_dtypes(wide_features)
+    budget.track('wide_features', wide_features)
     
     # Save to parquet
     processed_dir = base_path / "data/processed"
     processed_dir.mkdir(parents=True, exist_ok=True)
     
     output_path = processed_dir / "protein_features.parquet"
-    wide_features.to_parquet(output_path)
-    print(f"Saved processed protein features to {output_path}")
\ No newline at end of file
+    write_processed(wide_features, output_path)
+    print(f"Saved processed protein features to {output_path}")
+    print(budget.report().to_string(index=False))
\ No newline at end of file
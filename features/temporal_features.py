@@ -3,12 +3,15 @@ import numpy as np
 from typing import Dict
 from pathlib import Path
 from src.data_loader import load_clinical_data
+from features.partitioned import run_partitioned
+from src.processed_dataset import ProcessedDataset
+from src.dtype_planner import MemoryBudget, enforce_feature_dtypes
 
 def calculate_visit_intervals(df: pd.DataFrame) -> pd.DataFrame:
     """Calculate time gaps between visits"""
     df = df.sort_values(['patient_id', 'visit_month'])
-    df['months_since_last_visit'] = df.groupby('patient_id')['visit_month'].diff()
-    df['visit_frequency'] = df.groupby('patient_id')['visit_month'].transform(
+    df['months_since_last_visit'] = df.groupby('patient_id', observed=True)['visit_month'].diff()
+    df['visit_frequency'] = df.groupby('patient_id', observed=True)['visit_month'].transform(
         lambda x: x.diff().mean()
     )
     return df
@@ -18,9 +21,11 @@ def calculate_trajectory_slopes(df: pd.DataFrame, target_cols: list) -> Dict[str
     slopes = {}
     for col in target_cols:
         slope_name = f'{col}_slope'
-        df[slope_name] = df.groupby('patient_id').apply(
+        patient_slopes = df.groupby('patient_id', observed=True).apply(
             lambda x: np.polyfit(x['visit_month'], x[col], 1)[0]
-        ).reset_index(level=0, drop=True)
+        )
+        # Broadcast each patient's slope back onto their visits
+        df[slope_name] = patient_slopes.reindex(df['patient_id']).to_numpy()
         slopes[col] = df[slope_name]
     return slopes
 
@@ -43,13 +48,34 @@ def calculate_stability_metrics(df: pd.DataFrame, protein_cols: list) -> pd.Data
                 print(f"Skipping {protein} due to error: {str(e)}")
     return df
 
-def create_all_temporal_features(base_path: Path) -> pd.DataFrame:
-    """Generate complete set of temporal features"""
+def create_all_temporal_features(base_path: Path, n_jobs: int = 1,
+                                 budget: MemoryBudget = None) -> pd.DataFrame:
+    """Generate complete set of temporal features (n_jobs > 1 shards patients across processes)"""
+    budget = budget or MemoryBudget()
     clinical = load_clinical_data(base_path)
-    clinical = calculate_visit_intervals(clinical)
     
-    # Load processed protein features
-    protein_features = pd.read_parquet(base_path / "data/processed/protein_features.parquet")
+    # Load processed protein features (join keys and NPX_ columns only)
+    protein_features = (
+        ProcessedDataset(base_path / "data/processed/protein_features.parquet")
+        .select(['patient_id', 'visit_month'], prefix='NPX_')
+        .to_pandas()
+    )
+    budget.track('temporal_load', clinical, protein_features)
+    
+    if n_jobs == 1:
+        features = build_temporal_features(clinical, protein_features)
+    else:
+        features = run_partitioned(
+            'temporal',
+            {'clinical': clinical, 'protein_features': protein_features},
+            n_jobs=n_jobs
+        )
+    budget.track('temporal_features', features)
+    return features
+
+def build_temporal_features(clinical: pd.DataFrame, protein_features: pd.DataFrame) -> pd.DataFrame:
+    """Temporal features for already-loaded clinical and protein frames"""
+    clinical = calculate_visit_intervals(clinical)
     
     # Merge with clinical data
     clinical = clinical.merge(
@@ -68,4 +94,4 @@ def create_all_temporal_features(base_path: Path) -> pd.DataFrame:
     # Calculate protein stability
     clinical = calculate_stability_metrics(clinical, protein_cols)
     
-    return clinical
\ No newline at end of file
+    return enforce_feature_dtypes(clinical)
\ No newline at end of file
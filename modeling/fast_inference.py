@@ -0,0 +1,135 @@
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Union
+import numpy as np
+
+from modeling.prediction_cache import model_file_version
+from modeling.trainer import MODEL_DIR, TARGETS
+
+# lightgbm is only needed once boosters are loaded
+if TYPE_CHECKING:
+    import lightgbm as lgb
+    import pandas as pd
+
+INFERENCE_META = "inference.json"
+# Sized for a per-core L2 of ~1 MB: one float32 block of rows stays resident
+# while every tree walks it
+CACHE_BYTES = 1 << 20
+MIN_BLOCK_ROWS = 256
+
+Iteration = Union[None, int, str]
+
+def truncation_iteration(valid_curve: Sequence[float], tolerance: float = 0.01) -> int:
+    """First iteration (1-based) whose validation loss is within tolerance of the best"""
+    curve = np.asarray(valid_curve, dtype=np.float64)
+    return int(np.argmax(curve <= curve.min() * (1 + tolerance))) + 1
+
+def write_inference_meta(model_dir: Union[str, Path], best_iteration: int,
+                         valid_curve: Sequence[float], tolerance: float = 0.01) -> dict:
+    """Record the full and the truncated operating points next to model.txt"""
+    curve = list(valid_curve)[:best_iteration] if best_iteration > 0 else list(valid_curve)
+    meta = {
+        'best_iteration': best_iteration if best_iteration > 0 else len(curve),
+        'fast_iteration': truncation_iteration(curve, tolerance),
+        'fast_tolerance': tolerance,
+    }
+    with open(Path(model_dir) / INFERENCE_META, 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+def load_inference_meta(model_dir: Union[str, Path]) -> dict:
+    """Operating points saved by the trainer (empty for models trained before they were recorded)"""
+    path = Path(model_dir) / INFERENCE_META
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def resolve_iteration(meta: dict, iteration: Iteration) -> Optional[int]:
+    """
+    Number of trees to use for a requested operating point.
+
+    Args:
+        meta: Output of load_inference_meta
+        iteration: None or 'full' for every tree, 'best' / 'fast' for the points
+            recorded by the trainer, or an explicit tree count
+
+    Returns:
+        Tree count for Booster.predict(num_iteration=...), None for all trees
+    """
+    if iteration is None or iteration == 'full':
+        return None
+    if iteration == 'best':
+        return meta.get('best_iteration')
+    if iteration == 'fast':
+        return meta.get('fast_iteration', meta.get('best_iteration'))
+    if isinstance(iteration, int):
+        return iteration
+    raise ValueError(f"Unknown iteration: {iteration!r}")
+
+def choose_block_rows(n_features: int, cache_bytes: int = CACHE_BYTES) -> int:
+    """Rows per block so a float32 block fits in cache_bytes"""
+    return max(MIN_BLOCK_ROWS, cache_bytes // (4 * max(n_features, 1)))
+
+def fast_predict(booster: 'lgb.Booster', features, num_iteration: Optional[int] = None,
+                 block_rows: Optional[int] = None) -> np.ndarray:
+    """
+    Score a feature matrix in float32, block by block, with an optional tree cutoff.
+
+    LightGBM reads float32 matrices natively, so the conversion replaces the
+    float64 copy it would otherwise make. Its pred_early_stop option only
+    applies to classification objectives; for these regression boosters early
+    exit means truncating the ensemble through num_iteration.
+
+    Args:
+        booster: Trained LightGBM Booster
+        features: Array or DataFrame with columns in booster.feature_name() order
+        num_iteration: Trees to use (None for all)
+        block_rows: Rows per predict call (default: sized by choose_block_rows)
+
+    Returns:
+        float64 predictions, one per row
+    """
+    X = np.ascontiguousarray(features, dtype=np.float32)
+    block_rows = block_rows or choose_block_rows(X.shape[1])
+    predictions = np.empty(len(X), dtype=np.float64)
+    for start in range(0, len(X), block_rows):
+        predictions[start:start + block_rows] = booster.predict(
+            X[start:start + block_rows], num_iteration=num_iteration
+        )
+    return predictions
+
+class HighThroughputScorer:
+    """Float32, block-wise and optionally truncated scoring for every UPDRS target.
+
+    Meant for population-screening batches where throughput matters more than
+    the last decimal; use benchmarks/inference_throughput_benchmark.py to pick
+    the iteration for a given accuracy budget.
+    """
+
+    def __init__(self, model_dir: Union[str, Path] = MODEL_DIR, iteration: Iteration = 'fast',
+                 block_rows: Optional[int] = None):
+        import lightgbm as lgb
+        self.block_rows = block_rows
+        self.models: Dict[str, lgb.Booster] = {}
+        self.iterations: Dict[str, Optional[int]] = {}
+        # Content hash of each loaded file, to key cached predictions of exactly these models
+        self.versions: Dict[str, str] = {}
+        for target in TARGETS:
+            model_path = Path(model_dir) / target / "model.txt"
+            if model_path.exists():
+                self.models[target] = lgb.Booster(model_file=str(model_path))
+                self.versions[target] = model_file_version(model_path)
+                self.iterations[target] = resolve_iteration(load_inference_meta(model_path.parent), iteration)
+
+    def predict_matrix(self, target: str, features) -> np.ndarray:
+        """Predictions for a matrix already in the target model's feature order"""
+        return fast_predict(self.models[target], features, self.iterations[target], self.block_rows)
+
+    def predict_target(self, target: str, data: 'pd.DataFrame') -> np.ndarray:
+        """Predictions for one target from a DataFrame holding its features"""
+        return self.predict_matrix(target, data[self.models[target].feature_name()])
+
+    def predict(self, data: 'pd.DataFrame') -> Dict[str, np.ndarray]:
+        """Predictions for every loaded target"""
+        return {target: self.predict_target(target, data) for target in self.models}
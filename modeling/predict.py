@@ -1,40 +1,91 @@
-import lightgbm as lgb
-import pandas as pd
-import numpy as np
+from __future__ import annotations
+
+import hashlib
 import json
 import logging
-from typing import Dict, Union
-from pydantic import BaseModel, ValidationError, confloat, conint
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Optional, Union
+
+# Heavy dependencies (lightgbm, pandas, numpy, pydantic) are imported where
+# they are first needed so that importing this module stays cheap for
+# cold-start scoring workers. See benchmarks/import_time_benchmark.py.
+if TYPE_CHECKING:
+    import pandas as pd
+    from modeling.prediction_cache import PredictionCache
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class ClinicalInput(BaseModel):
-    """Pydantic model for input validation with clinical constraints"""
-    visit_month: conint(ge=0, le=120)  # 0-10 years range
-    visit_gap: conint(ge=0, le=24)      # Max 2 years between visits
-    months_since_first: conint(ge=0, le=120)
-    prot_O00391: confloat(ge=0)
-    prot_P05067: confloat(ge=0)
-    prot_Q9Y6K9: confloat(ge=0)
-    prot_O00391_delta: float
-    prot_P05067_delta: float
-    prot_Q9Y6K9_delta: float
-    disease_stage: conint(ge=0, le=3)   # 0=early, 1=mild, 2=moderate, 3=severe
-    med_response: confloat(ge=0, le=100) # Percentage scale
-    on_medication: conint(ge=0, le=1)   # Binary flag
+@lru_cache(maxsize=None)
+def _clinical_input_model():
+    """Build the pydantic input schema on first validation"""
+    from pydantic import BaseModel, confloat, conint
+
+    class ClinicalInput(BaseModel):
+        """Pydantic model for input validation with clinical constraints"""
+        visit_month: conint(ge=0, le=120)  # 0-10 years range
+        visit_gap: conint(ge=0, le=24)      # Max 2 years between visits
+        months_since_first: conint(ge=0, le=120)
+        prot_O00391: confloat(ge=0)
+        prot_P05067: confloat(ge=0)
+        prot_Q9Y6K9: confloat(ge=0)
+        prot_O00391_delta: float
+        prot_P05067_delta: float
+        prot_Q9Y6K9_delta: float
+        disease_stage: conint(ge=0, le=3)   # 0=early, 1=mild, 2=moderate, 3=severe
+        med_response: confloat(ge=0, le=100) # Percentage scale
+        on_medication: conint(ge=0, le=1)   # Binary flag
+
+    return ClinicalInput
+
+def __getattr__(name):
+    # Keeps `from modeling.predict import ClinicalInput` working without an eager pydantic import
+    if name == 'ClinicalInput':
+        return _clinical_input_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+PRIMARY = 'primary'
+PENDING_TRUTH_ROWS = 100_000  # predictions kept per visit while waiting for ground truth
+PROBE_ROWS = 256  # rows timed per shadow at load to seed its latency estimate
 
 class ParkinsonPredictor:
-    def __init__(self, model_path='modeling/models/updrs_3_adj/model.txt'):
-        """Initialize predictor with clinical-grade validation"""
-        try:
-            self.model = lgb.Booster(model_file=model_path)
-            self.model_version = self._extract_model_version(model_path)
-            logger.info(f"Loaded model v{self.model_version} from {model_path}")
-        except Exception as e:
-            logger.error(f"Model loading failed: {str(e)}")
-            raise RuntimeError("Clinical predictor initialization failed") from e
+    def __init__(self, model_path='modeling/models/updrs_3_adj/model.txt',
+                 shadow_model_paths: Optional[Dict[str, str]] = None,
+                 shadow_latency_budget_ms: float = 50.0,
+                 cache: Optional['PredictionCache'] = None):
+        """
+        Initialize predictor with clinical-grade validation
+        
+        Args:
+            model_path: Production (primary) model; its predictions are returned
+            shadow_model_paths: Optional name -> path of candidate models scored
+                on the same validated features but never returned
+            shadow_latency_budget_ms: Max time per predict() call spent on shadows;
+                a shadow is skipped when its estimated latency for the batch (p95
+                of its recent per-row latency) exceeds what is left of the budget
+            cache: Optional PredictionCache; rows seen before (same feature values
+                and model version) skip validation and scoring
+        """
+        self.model, self.model_version = self._load_model(model_path)
+        self.shadow_models = {}
+        self.shadow_versions = {}
+        for name, path in (shadow_model_paths or {}).items():
+            self.shadow_models[name], self.shadow_versions[name] = self._load_model(path)
+        self.shadow_latency_budget_ms = shadow_latency_budget_ms
+        
+        # Per-model latency/delta/SMAPE accounting for shadow comparisons
+        self.scoring_stats = {
+            name: {'calls': 0, 'rows': 0, 'skipped': 0, 'latency_ms': deque(maxlen=1000),
+                   'ms_per_row': deque(maxlen=100),
+                   'abs_delta_sum': 0.0, 'max_abs_delta': 0.0, 'smape_sum': 0.0, 'truth_rows': 0}
+            for name in [PRIMARY, *self.shadow_models]
+        }
+        # visit key -> predictions of [PRIMARY, *shadows] (NaN where skipped), awaiting ground truth
+        self._pending_truth: OrderedDict = OrderedDict()
+        for name in self.shadow_models:
+            self._probe_shadow(name)
+        self.cache = cache
         
         # Define clinical feature expectations
         self.expected_features = [
@@ -50,23 +101,65 @@ class ParkinsonPredictor:
             'medication_alert_threshold': 0.5  # >50% response needed
         }
     
-    def _extract_model_version(self, path: str) -> str:
-        """Extract model version from metadata if available"""
+    def reload_model(self, model_path: str) -> None:
+        """Swap in a new primary model and invalidate cached predictions"""
+        self.model, self.model_version = self._load_model(model_path)
+        if self.cache is not None:
+            self.cache.clear()
+    
+    def _load_model(self, model_path: str):
+        """Load a Booster and its version, with clinical-grade error reporting"""
+        try:
+            import lightgbm as lgb
+            model = lgb.Booster(model_file=model_path)
+            model_version = self._extract_model_version(model_path, model)
+            logger.info(f"Loaded model v{model_version} from {model_path}")
+            return model, model_version
+        except Exception as e:
+            logger.error(f"Model loading failed: {str(e)}")
+            raise RuntimeError("Clinical predictor initialization failed") from e
+    
+    def _extract_model_version(self, path: str, model=None) -> str:
+        """Extract model version from metadata, else tag the default with a file hash"""
+        model = model if model is not None else self.model
         try:
             # LightGBM models can store metadata
-            return self.model.params.get('version', '1.0.0')
+            version = model.params.get('version')
         except AttributeError:
-            return "1.0.0"
+            version = None
+        if version:
+            return version
+        # Without metadata, a content hash keeps different model files apart
+        with open(path, 'rb') as f:
+            return f"1.0.0+{hashlib.sha1(f.read()).hexdigest()[:8]}"
     
-    def validate_input(self, input_data: pd.DataFrame) -> None:
-        """Comprehensive clinical data validation"""
-        # 1. Feature existence check
+    def _probe_shadow(self, name: str) -> None:
+        """Time a shadow on a dummy batch so the budget check has an estimate before live traffic"""
+        import numpy as np
+        model = self.shadow_models[name]
+        probe = np.zeros((PROBE_ROWS, model.num_feature()))
+        start = time.perf_counter()
+        try:
+            model.predict(probe)
+        except Exception:
+            logger.exception(f"Shadow model {name} failed its latency probe")
+            return
+        self.scoring_stats[name]['ms_per_row'].append(1000 * (time.perf_counter() - start) / PROBE_ROWS)
+    
+    def _check_feature_presence(self, input_data: pd.DataFrame) -> None:
         missing_features = set(self.expected_features) - set(input_data.columns)
         if missing_features:
             logger.error(f"Missing clinical features: {missing_features}")
             raise ValueError(f"Required features missing: {', '.join(missing_features)}")
+    
+    def validate_input(self, input_data: pd.DataFrame) -> None:
+        """Comprehensive clinical data validation"""
+        # 1. Feature existence check
+        self._check_feature_presence(input_data)
         
         # 2. Pydantic validation for each row
+        from pydantic import ValidationError
+        ClinicalInput = _clinical_input_model()
         errors = []
         for i, row in input_data.iterrows():
             try:
@@ -89,14 +182,35 @@ class ParkinsonPredictor:
             DataFrame with predictions and clinical insights
         """
         try:
-            # Validate before prediction
-            self.validate_input(input_data)
+            truth_keys = self._truth_keys(input_data) if self.shadow_models else None
             
             # Ensure feature order
+            self._check_feature_presence(input_data)
             input_data = input_data[self.expected_features]
             
-            # Generate predictions
-            predictions = self.model.predict(input_data)
+            if self.cache is None:
+                # Validate before prediction; one feature matrix shared by primary and shadows
+                self.validate_input(input_data)
+                features = input_data.to_numpy(dtype='float64')
+                predictions = self._score(features, truth_keys)
+            else:
+                from modeling.prediction_cache import feature_keys
+                # Cache keys hash the numeric rows, so convert first; input that is not
+                # numeric fails the clinical validation rather than the conversion
+                try:
+                    features = input_data.to_numpy(dtype='float64')
+                except (TypeError, ValueError):
+                    self.validate_input(input_data)
+                    raise
+                keys = feature_keys(features, self.model_version)
+                predictions, missing = self.cache.get_many(keys)
+                if missing.any():
+                    # Only rows not seen before need validating and scoring
+                    self.validate_input(input_data[missing])
+                    predictions[missing] = self._score(
+                        features[missing], truth_keys[missing] if truth_keys is not None else None
+                    )
+                    self.cache.put_many([key for key, miss in zip(keys, missing) if miss], predictions[missing])
             
             # Create clinical interpretation
             output = input_data.copy()
@@ -109,6 +223,134 @@ class ParkinsonPredictor:
             logger.exception("Prediction failed")
             raise RuntimeError("Clinical prediction error") from e
     
+    def _truth_keys(self, input_data: pd.DataFrame) -> Optional[pd.Index]:
+        """
+        Per-row keys that later ground truth is matched on (visit_id column, else the index)
+        
+        Returns None when the batch has no usable visit key; shadow scoring is
+        then skipped for the batch and the primary predictions are unaffected.
+        """
+        import pandas as pd
+        if 'visit_id' in input_data.columns:
+            keys = pd.Index(input_data['visit_id'])
+        elif isinstance(input_data.index, pd.RangeIndex):
+            # Positional labels repeat across calls, so they cannot identify visits
+            logger.warning("Skipping shadow scoring: no visit_id column or index of visit ids")
+            return None
+        else:
+            keys = input_data.index
+        if not keys.is_unique:
+            logger.warning("Skipping shadow scoring: visit ids are not unique within the batch")
+            return None
+        return keys
+    
+    def _score(self, features, keys=None):
+        """Primary predictions for a feature matrix, plus shadow scoring when rows have visit keys"""
+        start = time.perf_counter()
+        predictions = self.model.predict(features)
+        self._record_latency(PRIMARY, len(features), time.perf_counter() - start)
+        if self.shadow_models and keys is not None:
+            self._score_shadows(features, predictions, keys)
+        return predictions
+    
+    def _record_latency(self, name: str, rows: int, seconds: float) -> None:
+        stats = self.scoring_stats[name]
+        stats['calls'] += 1
+        stats['rows'] += rows
+        stats['latency_ms'].append(1000 * seconds)
+        if rows:
+            stats['ms_per_row'].append(1000 * seconds / rows)
+    
+    def _estimated_shadow_ms(self, name: str, rows: int) -> float:
+        """p95 of the shadow's recent per-row latency, scaled to this batch"""
+        import numpy as np
+        ms_per_row = self.scoring_stats[name]['ms_per_row']
+        # A shadow that never produced a timing is assumed too slow to run
+        return float(np.percentile(ms_per_row, 95)) * rows if ms_per_row else float('inf')
+    
+    def _score_shadows(self, features, primary_predictions, keys) -> None:
+        """Score the shadow models that fit in the latency budget; never raises"""
+        import numpy as np
+        batch = {PRIMARY: primary_predictions}
+        spent_ms = 0.0
+        for name, model in self.shadow_models.items():
+            remaining_ms = self.shadow_latency_budget_ms - spent_ms
+            if self._estimated_shadow_ms(name, len(features)) > remaining_ms:
+                self.scoring_stats[name]['skipped'] += 1
+                continue
+            start = time.perf_counter()
+            try:
+                shadow_predictions = model.predict(features)
+            except Exception:
+                logger.exception(f"Shadow model {name} failed")
+                self.scoring_stats[name]['skipped'] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            spent_ms += 1000 * elapsed
+            self._record_latency(name, len(features), elapsed)
+            
+            abs_delta = np.abs(shadow_predictions - primary_predictions)
+            stats = self.scoring_stats[name]
+            stats['abs_delta_sum'] += float(abs_delta.sum())
+            stats['max_abs_delta'] = max(stats['max_abs_delta'], float(abs_delta.max(initial=0.0)))
+            batch[name] = shadow_predictions
+        
+        # One row of [PRIMARY, *shadows] predictions per visit; a re-scored visit replaces its entry
+        columns = [batch.get(name, np.full(len(features), np.nan)) for name in self.scoring_stats]
+        for key, row in zip(keys, np.column_stack(columns)):
+            self._pending_truth[key] = row
+            self._pending_truth.move_to_end(key)
+        while len(self._pending_truth) > PENDING_TRUTH_ROWS:
+            self._pending_truth.popitem(last=False)
+    
+    def record_ground_truth(self, y_true: pd.Series) -> None:
+        """
+        Attach observed UPDRS3_adj values to earlier predictions and update SMAPE
+        
+        Args:
+            y_true: Observed values indexed by visit_id (the visit_id column or
+                index of the predict() input); each visit is scored once
+        """
+        import numpy as np
+        from modeling.eval.metrics import clinical_smape
+        
+        y_true = y_true[~y_true.index.duplicated(keep='last')]
+        matched = [key for key in y_true.index if key in self._pending_truth]
+        if not matched:
+            return
+        truth = y_true.loc[matched].to_numpy(dtype='float64')
+        predictions = np.vstack([self._pending_truth.pop(key) for key in matched])
+        for column, name in enumerate(self.scoring_stats):
+            scored = ~np.isnan(predictions[:, column])
+            if not scored.any():
+                continue
+            stats = self.scoring_stats[name]
+            smape = clinical_smape(truth[scored], predictions[scored, column], 'updrs_3_adj')
+            stats['smape_sum'] += smape * scored.sum()
+            stats['truth_rows'] += int(scored.sum())
+    
+    def shadow_report(self) -> pd.DataFrame:
+        """Latency, output delta vs primary and SMAPE for every scored model"""
+        import numpy as np
+        import pandas as pd
+        rows = []
+        for name, stats in self.scoring_stats.items():
+            latency = np.asarray(stats['latency_ms'])
+            rows.append({
+                'model': name,
+                'version': self.model_version if name == PRIMARY else self.shadow_versions[name],
+                'calls': stats['calls'],
+                'skipped_calls': stats['skipped'],
+                'rows': stats['rows'],
+                'mean_latency_ms': latency.mean() if len(latency) else np.nan,
+                'p95_latency_ms': np.percentile(latency, 95) if len(latency) else np.nan,
+                'mean_abs_delta': stats['abs_delta_sum'] / stats['rows'] if stats['rows'] and name != PRIMARY else np.nan,
+                'max_abs_delta': stats['max_abs_delta'] if name != PRIMARY else np.nan,
+                'smape': stats['smape_sum'] / stats['truth_rows'] if stats['truth_rows'] else np.nan,
+                'truth_rows': stats['truth_rows'],
+            })
+        return pd.DataFrame(rows)
+    
     def add_clinical_insights(self, results: pd.DataFrame) -> pd.DataFrame:
         """Enhance predictions with clinical interpretation"""
         # 1. Risk stratification
@@ -136,6 +378,8 @@ class ParkinsonPredictor:
     @staticmethod
     def create_sample_input(num_samples=1) -> pd.DataFrame:
         """Generate clinically valid sample data"""
+        import numpy as np
+        import pandas as pd
         return pd.DataFrame({
             'visit_month': np.random.randint(0, 36, num_samples),
             'visit_gap': np.random.randint(1, 6, num_samples),
@@ -164,6 +408,8 @@ class ParkinsonPredictor:
 
 # API Integration Example
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    
     # Initialize clinical predictor
     predictor = ParkinsonPredictor()
     
@@ -0,0 +1,186 @@
+import hashlib
+import sqlite3
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+import numpy as np
+
+SQLITE_CHUNK = 500
+# Over max_disk_entries the SQLite tier is trimmed to this fraction of it, so
+# the row count only needs re-checking after that many more inserts
+DISK_TRIM_FRACTION = 0.9
+
+@lru_cache(maxsize=None)
+def _file_hash(path: str, size: int, mtime_ns: int) -> str:
+    # size and mtime_ns are only part of the cache key: a rewritten file is hashed again
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+def model_file_version(path: Union[str, Path]) -> str:
+    """Content hash of a model file, so retrained files never share cache keys (hashed once per file state)"""
+    stat = Path(path).stat()
+    return _file_hash(str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+
+def feature_keys(features: np.ndarray, model_version: str) -> List[str]:
+    """One key per row: hash of the ordered feature values plus the model version"""
+    rows = np.ascontiguousarray(features, dtype=np.float64)
+    prefix = model_version.encode()
+    return [hashlib.sha1(prefix + row.tobytes()).hexdigest() for row in rows]
+
+class PredictionCache:
+    """Bounded LRU/TTL cache of per-row predictions with an optional SQLite tier.
+
+    The in-memory tier holds up to max_entries keys in LRU order; entries older
+    than ttl_seconds are treated as misses. With disk_path set, entries are also
+    written to a SQLite file so other processes (dashboards, report jobs) can
+    reuse them. Each write to that file deletes expired rows; once the tier may
+    hold more than max_disk_entries rows, the oldest are deleted down to
+    DISK_TRIM_FRACTION of it.
+    """
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: Optional[float] = None,
+                 disk_path: Optional[Union[str, Path]] = None, max_disk_entries: int = 1_000_000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self._memory: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._disk = None
+        self._disk_rows = 0  # upper bound on the SQLite row count since it was last counted
+        if disk_path is not None:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._disk = sqlite3.connect(str(disk_path), check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, value REAL, created REAL)"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS predictions_created ON predictions (created)")
+            self._disk_rows = self.disk_entries()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def get_many(self, keys: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Cached values (NaN where missing) and the boolean miss mask"""
+        now = time.time()
+        values = np.full(len(keys), np.nan)
+        missing = np.ones(len(keys), dtype=bool)
+        disk_lookups = []
+        for i, key in enumerate(keys):
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1], now):
+                self._memory.move_to_end(key)
+                values[i], missing[i] = entry[0], False
+            elif self._disk is not None:
+                disk_lookups.append(i)
+
+        if disk_lookups:
+            wanted = sorted({keys[i] for i in disk_lookups})
+            found = {}
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(wanted), SQLITE_CHUNK):
+                chunk = wanted[start:start + SQLITE_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                for key, value, created in self._disk.execute(
+                    f"SELECT key, value, created FROM predictions WHERE key IN ({placeholders})", chunk
+                ):
+                    if not self._expired(created, now):
+                        found[key] = (value, created)
+            for i in disk_lookups:
+                if keys[i] in found:
+                    values[i], missing[i] = found[keys[i]][0], False
+                    self._remember(keys[i], *found[keys[i]])
+                    self.disk_hits += 1
+
+        self.misses += int(missing.sum())
+        self.hits += int((~missing).sum())
+        return values, missing
+
+    def _remember(self, key: str, value: float, created: float) -> None:
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def put_many(self, keys: List[str], values: np.ndarray) -> None:
+        """Store freshly computed predictions in every tier"""
+        now = time.time()
+        for key, value in zip(keys, values):
+            self._remember(key, float(value), now)
+        if self._disk is not None:
+            with self._disk:
+                self._disk.executemany(
+                    "INSERT OR REPLACE INTO predictions (key, value, created) VALUES (?, ?, ?)",
+                    [(key, float(value), now) for key, value in zip(keys, values)]
+                )
+                # Replaced keys are counted too, so this only overestimates
+                self._disk_rows += len(keys)
+                self._trim_disk(now)
+
+    def _trim_disk(self, now: float) -> None:
+        """Delete expired rows, then the oldest rows once the tier may be over max_disk_entries"""
+        if self.ttl_seconds is not None:
+            expired = self._disk.execute("DELETE FROM predictions WHERE created < ?", (now - self.ttl_seconds,))
+            self._disk_rows = max(0, self._disk_rows - expired.rowcount)
+        if self._disk_rows <= self.max_disk_entries:
+            return
+        # Other processes may share the file, so count before deleting
+        (count,) = self._disk.execute("SELECT COUNT(*) FROM predictions").fetchone()
+        if count > self.max_disk_entries:
+            keep = int(self.max_disk_entries * DISK_TRIM_FRACTION)
+            self._disk.execute(
+                "DELETE FROM predictions WHERE key IN "
+                "(SELECT key FROM predictions ORDER BY created LIMIT ?)",
+                (count - keep,)
+            )
+            count = keep
+        self._disk_rows = count
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop the in-memory tier (e.g. after a model reload); optionally the disk tier too"""
+        self._memory.clear()
+        if disk and self._disk is not None:
+            with self._disk:
+                self._disk.execute("DELETE FROM predictions")
+            self._disk_rows = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """Hit-rate metrics"""
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'entries': len(self._memory),
+            'disk_entries': self.disk_entries(),
+        }
+
+    def disk_entries(self) -> int:
+        """Rows currently stored in the SQLite tier (0 without one)"""
+        if self._disk is None:
+            return 0
+        return self._disk.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+def cached_predict(cache: PredictionCache, predict: Callable[[np.ndarray], np.ndarray],
+                   features: np.ndarray, model_version: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predict through the cache: lookups for every row, one batch call for the misses.
+
+    Returns:
+        predictions for all rows and the boolean mask of rows that were computed
+    """
+    keys = feature_keys(features, model_version)
+    predictions, missing = cache.get_many(keys)
+    if missing.any():
+        computed = predict(features[missing])
+        predictions[missing] = computed
+        cache.put_many([key for key, miss in zip(keys, missing) if miss], computed)
+    return predictions, missing
@@ -1,13 +1,20 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
-import lightgbm as lgb
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, Optional
+from modeling.submission.scoring_session import OnlineScoringSession
+from modeling.prediction_cache import PredictionCache, cached_predict, model_file_version
+from modeling.fast_inference import HighThroughputScorer
+
+# lightgbm is only needed once models are loaded
+if TYPE_CHECKING:
+    import lightgbm as lgb
 
 MODEL_DIR = Path("modeling/models")
 
-def load_models() -> Dict[str, lgb.Booster]:
+def load_models() -> Dict[str, 'lgb.Booster']:
     """Load all trained models"""
+    import lightgbm as lgb
     models = {}
     targets = ['updrs_1', 'updrs_2', 'updrs_3', 'updrs_3_adj', 'updrs_4']
     
@@ -18,17 +25,36 @@ def load_models() -> Dict[str, lgb.Booster]:
     
     return models
 
-def preprocess_input(data: pd.DataFrame) -> pd.DataFrame:
+def load_model_versions() -> Dict[str, str]:
+    """Content hash per target model in MODEL_DIR, used to key cached predictions (files are hashed once)"""
+    return {
+        target: model_file_version(MODEL_DIR / target / "model.txt")
+        for target in ['updrs_1', 'updrs_2', 'updrs_3', 'updrs_3_adj', 'updrs_4']
+        if (MODEL_DIR / target / "model.txt").exists()
+    }
+
+def preprocess_input(data: pd.DataFrame, session: Optional[OnlineScoringSession] = None) -> pd.DataFrame:
     """Prepare API data for model consumption"""
+    # With a session, history from earlier API calls is carried over
+    if session is not None:
+        return session.transform(data)
+    
     # Add required temporal features
     data['visit_gap'] = data.groupby('patient_id')['visit_month'].diff().fillna(0)
     data['months_since_first'] = data['visit_month'] - data.groupby('patient_id')['visit_month'].transform('min')
     return data
 
-def predict_test_set(api_data: pd.DataFrame) -> Dict[str, np.ndarray]:
-    """Generate predictions for Kaggle API"""
-    models = load_models()
-    processed_data = preprocess_input(api_data)
+def predict_test_set(api_data: pd.DataFrame,
+                     session: Optional[OnlineScoringSession] = None,
+                     cache: Optional[PredictionCache] = None,
+                     scorer: Optional[HighThroughputScorer] = None) -> Dict[str, np.ndarray]:
+    """Generate predictions for Kaggle API (float32/truncated trees when a scorer is given)"""
+    models = scorer.models if scorer is not None else load_models()
+    processed_data = preprocess_input(api_data, session)
+    # Versions of the models actually scored: a scorer may load them from another directory
+    versions = {}
+    if cache is not None:
+        versions = scorer.versions if scorer is not None else load_model_versions()
     results = {}
     
     for target, model in models.items():
@@ -36,13 +62,30 @@ def predict_test_set(api_data: pd.DataFrame) -> Dict[str, np.ndarray]:
         if target == 'updrs_3_adj':
             processed_data['on_medication'] = 1  # Default assumption
             
-        results[target] = model.predict(processed_data)
+        if cache is None:
+            if scorer is None:
+                results[target] = model.predict(processed_data)
+            else:
+                results[target] = scorer.predict_target(target, processed_data)
+        else:
+            # Keyed on the model's own ordered features, tagged with target, file hash
+            # and (for the fast path) the tree cutoff
+            features = processed_data[model.feature_name()].to_numpy(dtype=np.float64)
+            version = f"{target}:{versions[target]}"
+            predict = model.predict
+            if scorer is not None:
+                version += f":{scorer.iterations[target]}:float32"
+                predict = lambda X, target=target: scorer.predict_matrix(target, X)
+            results[target], _ = cached_predict(cache, predict, features, version)
         
     return results
 
-def generate_submission(api_data: pd.DataFrame) -> pd.DataFrame:
-    """Format predictions for Kaggle submission"""
-    preds = predict_test_set(api_data)
+def generate_submission(api_data: pd.DataFrame,
+                        session: Optional[OnlineScoringSession] = None,
+                        cache: Optional[PredictionCache] = None,
+                        scorer: Optional[HighThroughputScorer] = None) -> pd.DataFrame:
+    """Format predictions for Kaggle submission (pass one session across iterative API calls)"""
+    preds = predict_test_set(api_data, session, cache, scorer)
     submission = pd.DataFrame({
         'visit_id': api_data['visit_id'],
         **{f'updrs_{i}': preds[f'updrs_{i}'] for i in range(1,5)},
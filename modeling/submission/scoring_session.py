@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Sequence, Union
+
+BIOMARKER_COLS = ['prot_O00391', 'prot_P05067', 'prot_Q9Y6K9']
+
+class OnlineScoringSession:
+    """Per-patient feature state for the iterative time-series API.
+
+    Each API call delivers (usually) one new visit per patient. The session
+    remembers every patient's first and last visit month and last biomarker
+    values, so visit_gap, months_since_first and the prot_*_delta features
+    come out the same as on the full history while each call only touches
+    the rows in its batch. Visits must arrive in visit_month order per
+    patient; a visit older than the patient's last one is rejected, since the
+    stored state cannot recompute features in the middle of the history.
+    State lives in flat arrays indexed through a patient -> slot dict and can
+    be checkpointed to a single .npz file.
+    """
+
+    def __init__(self, biomarker_cols: Sequence[str] = BIOMARKER_COLS, capacity: int = 1024):
+        self.biomarker_cols = list(biomarker_cols)
+        self._slots: Dict[str, int] = {}
+        self._first_month = np.zeros(capacity, dtype=np.float64)
+        self._last_month = np.zeros(capacity, dtype=np.float64)
+        self._last_values = np.full((capacity, len(self.biomarker_cols)), np.nan)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _slot_indices(self, patient_ids: np.ndarray) -> np.ndarray:
+        """Slot of each patient, allocating slots (and growing arrays) for new ones"""
+        slots = np.empty(len(patient_ids), dtype=np.int64)
+        for i, pid in enumerate(patient_ids):
+            slot = self._slots.get(pid)
+            if slot is None:
+                slot = self._slots[pid] = len(self._slots)
+            slots[i] = slot
+        needed = len(self._slots)
+        if needed > len(self._first_month):
+            capacity = max(needed, 2 * len(self._first_month))
+            grow = capacity - len(self._first_month)
+            self._first_month = np.concatenate([self._first_month, np.zeros(grow)])
+            self._last_month = np.concatenate([self._last_month, np.zeros(grow)])
+            self._last_values = np.vstack([self._last_values, np.full((grow, len(self.biomarker_cols)), np.nan)])
+        return slots
+
+    def transform(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add visit_gap, months_since_first and biomarker deltas to a batch.
+
+        Rows keep their original order and index. A batch may hold several
+        visits of the same patient; they are chained in visit_month order.
+
+        Raises:
+            ValueError: a visit is older than the last visit already seen for
+                its patient (the session state is left unchanged)
+        """
+        data = batch.copy()
+        if data.empty:
+            for name in ['visit_gap', 'months_since_first'] + [f'{col}_delta' for col in self.biomarker_cols]:
+                data[name] = np.array([], dtype=np.float64)
+            return data
+        order = np.lexsort((data['visit_month'].to_numpy(), data['patient_id'].astype(str).to_numpy()))
+        sorted_rows = data.iloc[order]
+        patient_ids = sorted_rows['patient_id'].astype(str).to_numpy()
+        months = sorted_rows['visit_month'].to_numpy(dtype=np.float64)
+        values = np.full((len(sorted_rows), len(self.biomarker_cols)), np.nan)
+        for j, col in enumerate(self.biomarker_cols):
+            if col in sorted_rows.columns:
+                values[:, j] = sorted_rows[col].to_numpy(dtype=np.float64)
+
+        known = np.array([pid in self._slots for pid in patient_ids], dtype=bool)
+        if known.any():
+            known_slots = np.array([self._slots[pid] for pid in patient_ids[known]], dtype=np.int64)
+            out_of_order = months[known] < self._last_month[known_slots]
+            if out_of_order.any():
+                raise ValueError(
+                    "Visits older than the patient's last scored visit: "
+                    f"{sorted(set(patient_ids[known][out_of_order]))}"
+                )
+        slots = self._slot_indices(patient_ids)
+        # A row chains to the previous row when it is the same patient
+        chained = np.r_[False, patient_ids[1:] == patient_ids[:-1]]
+
+        prev_month = np.where(known, self._last_month[slots], np.nan)
+        prev_values = np.where(known[:, None], self._last_values[slots], np.nan)
+        prev_month[1:] = np.where(chained[1:], months[:-1], prev_month[1:])
+        prev_values[1:] = np.where(chained[1:, None], values[:-1], prev_values[1:])
+        # Earliest visit of each patient within this batch, merged with the state
+        group_start = np.maximum.accumulate(np.where(chained, 0, np.arange(len(months))))
+        first_month = np.where(known, np.minimum(self._first_month[slots], months[group_start]), months[group_start])
+
+        visit_gap = np.nan_to_num(months - prev_month, nan=0.0)
+        months_since_first = months - first_month
+        deltas = values - prev_values
+
+        # Last row of each patient in the batch becomes their new state
+        is_last = np.r_[~chained[1:], True]
+        last_slots = slots[is_last]
+        self._first_month[last_slots] = first_month[is_last]
+        self._last_month[last_slots] = months[is_last]
+        self._last_values[last_slots] = values[is_last]
+
+        features = {'visit_gap': visit_gap, 'months_since_first': months_since_first}
+        for j, col in enumerate(self.biomarker_cols):
+            features[f'{col}_delta'] = deltas[:, j]
+        unsorted = np.empty_like(order)
+        unsorted[order] = np.arange(len(order))
+        for name, column in features.items():
+            data[name] = column[unsorted]
+        return data
+
+    @staticmethod
+    def _checkpoint_path(path: Union[str, Path]) -> Path:
+        """Checkpoint file name with the .npz suffix np.savez would append"""
+        path = Path(path)
+        return path if path.suffix == '.npz' else path.with_name(path.name + '.npz')
+
+    def checkpoint(self, path: Union[str, Path]) -> None:
+        """Persist the session state to an .npz file ('.npz' is appended when missing)"""
+        n = len(self._slots)
+        patient_ids = np.empty(n, dtype=object)
+        for pid, slot in self._slots.items():
+            patient_ids[slot] = pid
+        np.savez(
+            self._checkpoint_path(path),
+            patient_ids=patient_ids.astype(str),
+            biomarker_cols=np.array(self.biomarker_cols, dtype=str),
+            first_month=self._first_month[:n],
+            last_month=self._last_month[:n],
+            last_values=self._last_values[:n]
+        )
+
+    @classmethod
+    def restore(cls, path: Union[str, Path]) -> 'OnlineScoringSession':
+        """Rebuild a session from a checkpoint (the same path given to checkpoint)"""
+        with np.load(cls._checkpoint_path(path)) as state:
+            n = len(state['patient_ids'])
+            session = cls(biomarker_cols=state['biomarker_cols'].tolist(), capacity=max(n, 1))
+            session._slots = {pid: slot for slot, pid in enumerate(state['patient_ids'].tolist())}
+            session._first_month[:n] = state['first_month']
+            session._last_month[:n] = state['last_month']
+            session._last_values[:n] = state['last_values']
+        return session
@@ -1,11 +1,13 @@
 import pandas as pd
 import numpy as np
-import lightgbm as lgb
-from sklearn.model_selection import TimeSeriesSplit
 from pathlib import Path
-import yaml
 import os
-import matplotlib.pyplot as plt
+from typing import TYPE_CHECKING
+
+# lightgbm, sklearn, yaml, pyarrow and matplotlib are imported inside the
+# functions that use them, so param/feature helpers import quickly
+if TYPE_CHECKING:
+    from src.plotting import PlotRenderer
 
 PROCESSED_DIR = Path("data/processed")
 MODEL_DIR = Path("modeling/models")
@@ -13,12 +15,13 @@ TARGETS = ['updrs_1', 'updrs_2', 'updrs_3', 'updrs_3_adj', 'updrs_4']
 
 def load_params(target: str) -> dict:
     """Load target-specific parameters from config"""
+    import yaml
     with open("modeling/configs/lgbm_params.yaml") as f:
         params = yaml.safe_load(f)
     return {**params['params'], **params.get(target, {})}
 
-def feature_engineer(df: pd.DataFrame, target: str) -> tuple:
-    """Target-specific feature engineering"""
+def target_features(target: str) -> list:
+    """Feature columns used for a given target"""
     base_features = [
         'visit_month', 'visit_gap', 'months_since_first',
         'prot_O00391', 'prot_P05067', 'prot_Q9Y6K9',
@@ -32,60 +35,88 @@ def feature_engineer(df: pd.DataFrame, target: str) -> tuple:
     else:
         features = base_features
     
-    return df[features], df[target]
+    return features
 
-def plot_feature_importance(model, features, target):
-    """Save feature importance plot"""
-    importance = pd.DataFrame({
-        'feature': features,
-        'importance': model.feature_importances_
-    }).sort_values('importance', ascending=False)
-    
-    plt.figure(figsize=(10, 6))
-    plt.barh(importance['feature'][:15], importance['importance'][:15])
-    plt.title(f'{target} Feature Importance')
-    plt.tight_layout()
-    plt.savefig(f"{MODEL_DIR}/{target}/feature_importance.png")
-    plt.close()
+CATEGORICAL_COLS = ['disease_stage', 'med_response', 'on_medication']
+
+def encode_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+    """Replace categorical feature columns with the integer codes the models were trained on"""
+    for col in CATEGORICAL_COLS:
+        if col in df.columns:
+            df[col] = pd.Categorical(df[col]).codes
+    return df
+
+def feature_engineer(df: pd.DataFrame, target: str) -> tuple:
+    """Target-specific feature engineering"""
+    return df[target_features(target)], df[target]
+
+def training_columns() -> list:
+    """Every column the training loop reads, across all targets"""
+    columns = []
+    for target in TARGETS:
+        columns += target_features(target) + [target]
+    return list(dict.fromkeys(columns))
+
+def plot_feature_importance(model, features, target, renderer: 'PlotRenderer' = None):
+    """Save feature importance plot (in the background when a renderer is given)"""
+    from src.plotting import render_feature_importance
+    args = (list(features), list(model.feature_importances_), target,
+            f"{MODEL_DIR}/{target}/feature_importance.png")
+    if renderer is None:
+        render_feature_importance(*args)
+    else:
+        renderer.submit(render_feature_importance, *args)
 
 def train_progression_models():
     """End-to-end training for all UPDRS targets"""
-    df = pd.read_parquet(PROCESSED_DIR / "enriched_clinical.parquet")
+    import lightgbm as lgb
+    from sklearn.model_selection import TimeSeriesSplit
+    from src.plotting import PlotRenderer
+    from src.processed_dataset import ProcessedDataset
+    from modeling.fast_inference import write_inference_meta
+    
+    # Only the feature/target columns are read from disk
+    df = ProcessedDataset(PROCESSED_DIR / "enriched_clinical.parquet").select(training_columns()).to_pandas()
     
     # Convert categorical columns to numeric codes
-    categorical_cols = ['disease_stage', 'med_response', 'on_medication']
-    for col in categorical_cols:
-        if col in df.columns:
-            df[col] = pd.Categorical(df[col]).codes
+    df = encode_categoricals(df)
     
-    for target in TARGETS:
-        os.makedirs(f"{MODEL_DIR}/{target}", exist_ok=True)
-        X, y = feature_engineer(df, target)
-        tscv = TimeSeriesSplit(n_splits=5)
-        models = []
-        scores = []
+    # Figures render in worker processes while the next target trains
+    with PlotRenderer() as renderer:
+        for target in TARGETS:
+            os.makedirs(f"{MODEL_DIR}/{target}", exist_ok=True)
+            X, y = feature_engineer(df, target)
+            tscv = TimeSeriesSplit(n_splits=5)
+            models = []
+            scores = []
         
-        for fold, (train_idx, val_idx) in enumerate(tscv.split(X)):
-            X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
-            y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
+            for fold, (train_idx, val_idx) in enumerate(tscv.split(X)):
+                X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
+                y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
             
-            model = lgb.LGBMRegressor(**load_params(target))
-            model.fit(
-                X_train, y_train,
-                eval_set=[(X_val, y_val)],
-                eval_metric='mae',
-                callbacks=[lgb.early_stopping(stopping_rounds=50)]
-            )
-            models.append(model)
-            preds = model.predict(X_val)
-            score = 100 * np.mean(np.abs(preds - y_val) / y_val.mean())
-            scores.append(score)
-            print(f"Fold {fold} {target} MAE%: {score:.2f}")
+                model = lgb.LGBMRegressor(**load_params(target))
+                model.fit(
+                    X_train, y_train,
+                    eval_set=[(X_val, y_val)],
+                    eval_metric='mae',
+                    callbacks=[lgb.early_stopping(stopping_rounds=50)]
+                )
+                models.append(model)
+                preds = model.predict(X_val)
+                score = 100 * np.mean(np.abs(preds - y_val) / y_val.mean())
+                scores.append(score)
+                print(f"Fold {fold} {target} MAE%: {score:.2f}")
         
-        best_model = models[np.argmin(scores)]
-        best_model.booster_.save_model(f"{MODEL_DIR}/{target}/model.txt")
-        plot_feature_importance(best_model, X.columns, target)
-        print(f"✅ Best {target} model saved (MAE%: {min(scores):.2f})")
+            best_model = models[np.argmin(scores)]
+            best_model.booster_.save_model(f"{MODEL_DIR}/{target}/model.txt")
+            # Operating points for high-throughput scoring (see modeling/fast_inference.py)
+            meta = write_inference_meta(
+                f"{MODEL_DIR}/{target}", best_model.best_iteration_ or 0,
+                best_model.evals_result_['valid_0']['l1']
+            )
+            plot_feature_importance(best_model, X.columns, target, renderer)
+            print(f"✅ Best {target} model saved (MAE%: {min(scores):.2f}, "
+                  f"trees: {meta['best_iteration']}, fast: {meta['fast_iteration']})")
 
 if __name__ == "__main__":
     train_progression_models()
\ No newline at end of file
@@ -4,34 +4,44 @@ from pathlib import Path
 import sys
 
 sys.path.append(str(Path(__file__).parent.parent))
-from src.data_loader import load_proteins
+from src.data_quality import run_quality_checks
 
-def analyze_protein_data(protein_id: str):
-    """Check data quality for a specific protein"""
-    proteins = load_proteins(Path('data/raw'))
-    prot_data = proteins[proteins['UniProt'] == protein_id]
+def analyze_protein_data(report: pd.DataFrame, histograms: pd.DataFrame, protein_id: str):
+    """Print the QC row for a protein and plot its shared-bin histogram"""
+    if protein_id not in report.index:
+        print(f"\n=== {protein_id} Data Quality Report ===")
+        print("WARNING: No measurements for this protein!")
+        return None
     
+    row = report.loc[protein_id]
     print(f"\n=== {protein_id} Data Quality Report ===")
-    print(prot_data['NPX'].describe())
+    print(row[['count', 'mean', 'std', 'min', 'q25', 'q50', 'q75', 'max']])
+    print(f"\nMissing Values: {row['missing']}/{row['rows']}")
+    print(f"Visit coverage: {row['visit_coverage']:.1%}")
     
-    # Plot distribution
+    if row['constant'] or row['near_constant']:
+        print("WARNING: Constant values detected!")
+    
+    # Distribution from the precomputed counts
+    counts = histograms.loc[protein_id]
+    left_edges = counts.index.astype(float)
     plt.figure(figsize=(10,4))
-    plt.hist(prot_data['NPX'], bins=50)
+    plt.bar(left_edges, counts.values, width=left_edges[1] - left_edges[0], align='edge')
     plt.title(f'{protein_id} Distribution')
-    plt.xlabel('NPX Value')
+    plt.xlabel('log10 NPX Value')
     plt.ylabel('Count')
     plt.savefig(f'results/{protein_id}_distribution.png')
     plt.close()
     
-    # Check missing values
-    print(f"\nMissing Values: {prot_data['NPX'].isna().sum()}/{len(prot_data)}")
-    
-    # Check constant values
-    if prot_data['NPX'].nunique() == 1:
-        print("WARNING: Constant values detected!")
-    
-    return prot_data
+    return row
 
 if __name__ == '__main__':
-    analyze_protein_data('Q9Y6K9')
-    analyze_protein_data('O00391')  # For comparison
\ No newline at end of file
+    qc = run_quality_checks(Path('.'), output_dir=Path('data/processed/qc'))
+    report = qc['report']
+    
+    print(f"Proteins checked: {len(report)}")
+    print(f"Constant: {report['constant'].sum()}, near-constant: {report['near_constant'].sum()}")
+    print(f"Proteins with missing values: {(report['missing'] > 0).sum()}")
+    
+    analyze_protein_data(report, qc['histograms'], 'Q9Y6K9')
+    analyze_protein_data(report, qc['histograms'], 'O00391')  # For comparison
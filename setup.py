@@ -9,7 +9,9 @@ setup(
         'pandas>=1.5.0',
         'numpy>=1.21.0',
         'scikit-learn>=1.0.0',
-        'pyyaml>=6.0'
+        'pyyaml>=6.0',
+        'pyarrow>=8.0.0',
+        'scipy>=1.7.0'
     ],
     python_requires='>=3.8',
 )
\ No newline at end of file
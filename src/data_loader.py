@@ -1,13 +1,62 @@
 import pandas as pd
 import numpy as np
+from functools import lru_cache
 from pathlib import Path
+from typing import Tuple
+from src.dtype_planner import optimize_dtypes
+from src.key_dictionary import KEY_COLUMNS, KeyDictionary
 
-def load_clinical_data(base_path: Path) -> pd.DataFrame:
+RAW_FILES = ['train_clinical_data.csv', 'train_proteins.csv', 'train_peptides.csv']
+
+@lru_cache(maxsize=None)
+def _fit_raw_keys(raw_dir: Path, stamp: Tuple) -> KeyDictionary:
+    # stamp (file sizes and mtimes) is only part of the cache key: a new data drop refits
+    keys = KeyDictionary()
+    for name in RAW_FILES:
+        path = raw_dir / name
+        if path.exists():
+            columns = [col for col in pd.read_csv(path, nrows=0).columns if col in KEY_COLUMNS]
+            keys.fit(pd.read_csv(path, usecols=columns, dtype='category'))
+    return keys
+
+def load_key_dictionary(base_path: Path) -> KeyDictionary:
+    """
+    Key dictionary over every raw file, shared by all loaders.
+
+    Fitting reads the key columns of every raw file, train_peptides.csv
+    included, so the first load in a process pays for one extra pass over
+    those columns. The result is cached until a raw file changes.
+    """
+    raw_dir = (Path(base_path) / "data" / "raw").resolve()
+    paths = [raw_dir / name for name in RAW_FILES]
+    stamp = tuple((path.name, path.stat().st_size, path.stat().st_mtime_ns) for path in paths if path.exists())
+    return _fit_raw_keys(raw_dir, stamp)
+
+def _read_keyed_csv(path: Path, dtypes: dict, keys: KeyDictionary) -> pd.DataFrame:
+    """
+    read_csv with the key columns encoded on the shared dictionary.
+
+    Keys are read as plain categories and then remapped, so a value the
+    dictionary does not know raises instead of being read as NaN.
+    """
+    key_dtypes = {col: 'category' for col in keys.categories}
+    df = pd.read_csv(path, dtype={**key_dtypes, **dtypes})
+    for col, categories in keys.categories.items():
+        if col not in df.columns:
+            continue
+        unknown = df[col].cat.categories[~df[col].cat.categories.astype(str).isin(categories)]
+        if len(unknown):
+            raise ValueError(
+                f"{len(unknown)} {col} values in {Path(path).name} are not in the key dictionary "
+                f"(e.g. {list(unknown[:3])}); refit it over the current raw files"
+            )
+    return keys.encode(df)
+
+def load_clinical_data(base_path: Path, keys: KeyDictionary = None) -> pd.DataFrame:
     """Load clinical data with dtype optimization and medication flag handling"""
+    keys = keys or load_key_dictionary(base_path)
+    # visit_month is sized from the observed range (long follow-ups pass 127)
     dtypes = {
-        'visit_id': 'category',
-        'patient_id': 'category',
-        'visit_month': 'int8',
         'updrs_1': 'float32',
         'updrs_2': 'float32',
         'updrs_3': 'float32',
@@ -17,7 +66,7 @@ def load_clinical_data(base_path: Path) -> pd.DataFrame:
     clinical_path = base_path / "data" / "raw" / "train_clinical_data.csv"
     if not clinical_path.exists():
         raise FileNotFoundError(f"Clinical data not found at: {clinical_path}")
-    df = pd.read_csv(clinical_path, dtype=dtypes)
+    df = _read_keyed_csv(clinical_path, dtypes, keys)
     
     # Critical: Convert medication to binary flag
     df['on_medication'] = df['upd23b_clinical_state_on_medication'].eq('On').astype('int8')
@@ -30,27 +79,21 @@ def load_clinical_data(base_path: Path) -> pd.DataFrame:
     # Create adjusted target
     df['updrs_3_adj'] = df['updrs_3'] + adjustment * df['on_medication']
     
-    return df
+    return optimize_dtypes(df)
 
-def load_peptides(base_path: Path) -> pd.DataFrame:
+def load_peptides(base_path: Path, keys: KeyDictionary = None) -> pd.DataFrame:
     """Peptide data with aggressive downcasting"""
+    keys = keys or load_key_dictionary(base_path)
     dtypes = {
-        'visit_id': 'category',
-        'patient_id': 'category',
-        'visit_month': 'int8',
-        'UniProt': 'category',
         'Peptide': 'category',
         'PeptideAbundance': 'float32'
     }
-    return pd.read_csv(base_path / "data\\raw\\train_peptides.csv", dtype=dtypes)
+    return optimize_dtypes(_read_keyed_csv(base_path / "data\\raw\\train_peptides.csv", dtypes, keys))
 
-def load_proteins(base_path: Path) -> pd.DataFrame:
+def load_proteins(base_path: Path, keys: KeyDictionary = None) -> pd.DataFrame:
     """Protein data (pre-aggregated)"""
+    keys = keys or load_key_dictionary(base_path)
     dtypes = {
-        'visit_id': 'category',
-        'patient_id': 'category',
-        'visit_month': 'int8',
-        'UniProt': 'category',
         'NPX': 'float32'
     }
-    return pd.read_csv(base_path / "data/raw/train_proteins.csv", dtype=dtypes)
\ No newline at end of file
+    return optimize_dtypes(_read_keyed_csv(base_path / "data/raw/train_proteins.csv", dtypes, keys))
\ No newline at end of file
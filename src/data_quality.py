@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict
+from src.data_loader import load_peptides, load_proteins
+
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+def _grouped_stats(df: pd.DataFrame, key: str, value: str, near_constant_cv: float) -> pd.DataFrame:
+    """count/missing/quantiles/constancy of value per key in one grouped pass"""
+    grouped = df.groupby(key, observed=True)[value]
+    stats = grouped.agg(['size', 'count', 'mean', 'std', 'min', 'max', 'nunique'])
+    stats = stats.rename(columns={'size': 'rows', 'nunique': 'n_unique'})
+    quantiles = grouped.quantile(QUANTILES).unstack()
+    quantiles.columns = [f'q{int(q * 100):02d}' for q in quantiles.columns]
+    stats = stats.join(quantiles)
+    # Plain string index so tables from different files line up
+    stats.index = stats.index.astype(str)
+
+    stats['missing'] = stats['rows'] - stats['count']
+    stats['missing_rate'] = stats['missing'] / stats['rows']
+    stats['constant'] = stats['n_unique'] <= 1
+    cv = stats['std'] / stats['mean'].abs()
+    stats['near_constant'] = ~stats['constant'] & (cv < near_constant_cv)
+    return stats
+
+def protein_qc(proteins: pd.DataFrame, near_constant_cv: float = 1e-3) -> pd.DataFrame:
+    """
+    Per-protein data-quality table for the whole NPX panel.
+
+    Columns: rows, count, mean, std, min, max, n_unique, q05..q95, missing,
+    missing_rate, constant, near_constant, visits_covered, visit_coverage.
+    """
+    stats = _grouped_stats(proteins, 'UniProt', 'NPX', near_constant_cv)
+    measured = proteins[proteins['NPX'].notna()]
+    covered = measured.groupby('UniProt', observed=True)['visit_id'].nunique()
+    covered.index = covered.index.astype(str)
+    stats['visits_covered'] = covered.reindex(stats.index).fillna(0).astype('int32')
+    stats['visit_coverage'] = stats['visits_covered'] / proteins['visit_id'].nunique()
+    return stats
+
+def peptide_qc(peptides: pd.DataFrame, near_constant_cv: float = 1e-3) -> pd.DataFrame:
+    """Per-protein summary of the underlying peptide abundances"""
+    stats = _grouped_stats(peptides, 'UniProt', 'PeptideAbundance', near_constant_cv).add_prefix('peptide_')
+    n_peptides = peptides.groupby('UniProt', observed=True)['Peptide'].nunique()
+    n_peptides.index = n_peptides.index.astype(str)
+    stats['n_peptides'] = n_peptides.reindex(stats.index)
+    return stats
+
+def shared_histograms(df: pd.DataFrame, key: str = 'UniProt', value: str = 'NPX',
+                      n_bins: int = 50) -> pd.DataFrame:
+    """
+    Histogram of log10(value) for every key over one shared set of bins.
+
+    Returns a key x bin count table whose columns are the left bin edges, so
+    any protein's distribution can be plotted or compared without recomputing.
+    """
+    data = df[[key, value]].dropna()
+    data = data[data[value] > 0]
+    logged = np.log10(data[value].to_numpy(dtype=np.float64))
+    edges = np.linspace(logged.min(), logged.max(), n_bins + 1)
+    bins = np.clip(np.searchsorted(edges, logged, side='right') - 1, 0, n_bins - 1)
+
+    codes, keys = pd.factorize(data[key], sort=True)
+    counts = np.bincount(codes * n_bins + bins, minlength=len(keys) * n_bins)
+    return pd.DataFrame(
+        counts.reshape(len(keys), n_bins),
+        index=pd.Index(keys.astype(str), name=key),
+        columns=[f'{edge:.3f}' for edge in edges[:-1]]
+    )
+
+def run_quality_checks(base_path: Path, output_dir: Path = None) -> Dict[str, pd.DataFrame]:
+    """Load proteins and peptides once, build the QC report and optionally save it"""
+    base_path = Path(base_path)
+    proteins = load_proteins(base_path)
+    peptides = load_peptides(base_path)
+
+    report = protein_qc(proteins).join(peptide_qc(peptides), how='left')
+    histograms = shared_histograms(proteins)
+
+    if output_dir is not None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        report.to_parquet(output_dir / 'protein_qc.parquet')
+        histograms.to_parquet(output_dir / 'protein_histograms.parquet')
+        print(f"Saved QC report for {len(report)} proteins to {output_dir}")
+
+    return {'report': report, 'histograms': histograms}
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+# Fixed category sets keep feature dtypes identical across runs and patient
+# shards. Order is alphabetical so category codes match what the trainer got
+# from pd.Categorical on the old object column.
+FEATURE_CATEGORIES = {
+    'disease_stage': ['advanced', 'early', 'moderate', 'unknown'],
+}
+# Integer feature columns get a fixed width instead of the observed-range
+# width plan_dtypes would pick (int16 holds visit months for centuries)
+FEATURE_INT_DTYPES = {
+    'visit_month': 'int16',
+    'months_since_first': 'int16',
+    'on_medication': 'int8',
+}
+
+INT_DTYPES = ['int8', 'int16', 'int32', 'int64']
+UINT_DTYPES = ['uint8', 'uint16', 'uint32', 'uint64']
+
+class MemoryBudgetExceeded(MemoryError):
+    """A pipeline stage holds more data than its memory budget allows"""
+
+def minimal_int_dtype(values: pd.Series) -> str:
+    """Smallest signed integer dtype holding the observed range"""
+    if values.empty:
+        return 'int8'
+    low, high = values.min(), values.max()
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return 'int64'
+
+def plan_dtypes(df: pd.DataFrame, categorical_threshold: float = 0.5) -> Dict[str, str]:
+    """
+    Infer a safe minimal dtype for every column from the observed values.
+
+    Integers get the smallest signed type that holds their range, floats
+    become float32 and object columns whose unique ratio is below
+    categorical_threshold become categories.
+    """
+    plan = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            plan[col] = minimal_int_dtype(series)
+        elif pd.api.types.is_float_dtype(series):
+            plan[col] = 'float32'
+        elif series.dtype == object and len(series):
+            if series.nunique(dropna=True) / len(series) < categorical_threshold:
+                plan[col] = 'category'
+    return plan
+
+def apply_dtypes(df: pd.DataFrame, plan: Dict[str, str]) -> pd.DataFrame:
+    """Cast columns that are not already at their planned dtype"""
+    changed = {col: dtype for col, dtype in plan.items() if col in df.columns and str(df[col].dtype) != dtype}
+    return df.astype(changed) if changed else df
+
+def optimize_dtypes(df: pd.DataFrame, categorical_threshold: float = 0.5) -> pd.DataFrame:
+    """Plan and apply minimal dtypes in one step (for freshly loaded frames)"""
+    return apply_dtypes(df, plan_dtypes(df, categorical_threshold))
+
+def enforce_feature_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Output dtypes for engineered features: float32, fixed integer widths and
+    fixed categories.
+
+    Unlike plan_dtypes this does not look at the value ranges, so every shard
+    of a partitioned run gets exactly the same dtypes. Integer columns outside
+    FEATURE_INT_DTYPES keep the dtype they were computed with. A label missing
+    from FEATURE_CATEGORIES raises ValueError instead of becoming NaN.
+    """
+    casts = {col: 'float32' for col in df.columns if df[col].dtype == np.float64}
+    for col, dtype in FEATURE_INT_DTYPES.items():
+        # Upcast (e.g. float) copies of integer features are narrowed back when complete
+        if col in df.columns and str(df[col].dtype) != dtype and df[col].notna().all():
+            casts[col] = dtype
+    for col, categories in FEATURE_CATEGORIES.items():
+        if col in df.columns:
+            series = df[col]
+            labels = series.cat.categories if isinstance(series.dtype, pd.CategoricalDtype) else series.dropna().unique()
+            unknown = set(labels) - set(categories)
+            if unknown:
+                raise ValueError(f"{col} labels {sorted(unknown)} are not in FEATURE_CATEGORIES")
+            casts[col] = pd.CategoricalDtype(categories)
+    return df.astype(casts) if casts else df
+
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    """Deep memory footprint of a DataFrame in MB"""
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+def estimate_frame_mb(rows: int, columns: int, bytes_per_value: int = 8) -> float:
+    """Footprint in MB of a numeric frame that has not been built yet"""
+    return rows * columns * bytes_per_value / 1024**2
+
+class MemoryBudget:
+    """Per-stage memory accounting with a hard limit.
+
+    reserve() is called before a large allocation (a pivot or merge) with the
+    frames it reads and an estimate of its output, and raises
+    MemoryBudgetExceeded before the allocation runs. track() records what a
+    stage actually holds afterwards and raises when that is over the limit,
+    before the next stage starts.
+    """
+
+    def __init__(self, limit_mb: Optional[float] = None):
+        self.limit_mb = limit_mb
+        self.stages: List[dict] = []
+
+    def reserve(self, stage: str, estimated_mb: float, *frames: pd.DataFrame) -> float:
+        """Check that the input frames plus the estimated output of a stage fit, before building it"""
+        return self._record(f'{stage} (planned)', frames, sum(frame_memory_mb(df) for df in frames) + estimated_mb)
+
+    def track(self, stage: str, *frames: pd.DataFrame) -> float:
+        """Record the footprint of the frames alive at this stage"""
+        return self._record(stage, frames, sum(frame_memory_mb(df) for df in frames))
+
+    def _record(self, stage: str, frames, used_mb: float) -> float:
+        self.stages.append({
+            'stage': stage,
+            'rows': sum(len(df) for df in frames),
+            'columns': sum(df.shape[1] for df in frames),
+            'memory_mb': round(used_mb, 2),
+        })
+        if self.limit_mb is not None and used_mb > self.limit_mb:
+            raise MemoryBudgetExceeded(
+                f"Stage '{stage}' needs {used_mb:.1f} MB, over the {self.limit_mb:.1f} MB budget"
+            )
+        return used_mb
+
+    def report(self) -> pd.DataFrame:
+        """Per-stage footprint table"""
+        return pd.DataFrame(self.stages, columns=['stage', 'rows', 'columns', 'memory_mb'])
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+KEY_COLUMNS = ('visit_id', 'patient_id', 'UniProt')
+
+class KeyDictionary:
+    """Shared dictionary for the join keys of all loaded frames.
+
+    Each raw file gets its own categories from read_csv, so two frames never
+    agree on codes and pandas merges fall back to object comparisons. One
+    dictionary fitted over every raw file (src.data_loader.load_key_dictionary)
+    re-encodes the key columns of each loaded frame, so all frames come out of
+    the loaders with the same sorted categories and merge on their int32 codes.
+    """
+
+    def __init__(self):
+        self.categories: Dict[str, pd.Index] = {}
+
+    def fit(self, *frames: pd.DataFrame) -> 'KeyDictionary':
+        """Collect the (sorted) union of key values across frames"""
+        for col in KEY_COLUMNS:
+            values = [self.categories[col]] if col in self.categories else []
+            for df in frames:
+                if col in df.columns:
+                    series = df[col]
+                    if isinstance(series.dtype, pd.CategoricalDtype):
+                        values.append(series.cat.categories.astype(str))
+                    else:
+                        values.append(pd.Index(series.dropna().astype(str).unique()))
+            if values:
+                self.categories[col] = values[0].append(values[1:]).unique().sort_values()
+        return self
+
+    def encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Re-encode key columns onto the shared categories"""
+        for col, categories in self.categories.items():
+            if col not in df.columns:
+                continue
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                # Remap through the categories only; the data itself is not touched
+                as_str = df[col].cat.rename_categories(df[col].cat.categories.astype(str))
+                df[col] = as_str.cat.set_categories(categories)
+            else:
+                df[col] = pd.Categorical(df[col].astype(str), categories=categories)
+        return df
+
+    def codes(self, df: pd.DataFrame, col: str) -> np.ndarray:
+        """Dense int32 codes of an encoded key column (-1 for missing)"""
+        return df[col].cat.codes.to_numpy().astype(np.int32)
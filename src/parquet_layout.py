@@ -0,0 +1,101 @@
+import json
+import math
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Iterable, List, Union
+
+SORT_KEYS = ['patient_id', 'visit_month']
+LAYOUT_KEY = b'amp_layout'  # Parquet key-value metadata entry describing the layout
+# Each patient bucket is one row group of roughly this size. Reading a row
+# group has a fixed cost per column chunk, so smaller groups make full reads
+# of the wide protein tables slower than the pruning saves.
+TARGET_ROW_GROUP_BYTES = 16 << 20
+MAX_BUCKETS = 64
+MAX_ROW_GROUP_ROWS = 1 << 20  # pyarrow's cap on rows per row group; larger buckets span several
+
+def patient_bucket(patient_ids: pd.Series, n_buckets: int) -> np.ndarray:
+    """Stable hash bucket of each patient_id (same value across processes and runs)"""
+    if isinstance(patient_ids.dtype, pd.CategoricalDtype):
+        # Hash each category once, then broadcast through the codes
+        category_hash = pd.util.hash_array(patient_ids.cat.categories.astype(str).to_numpy(dtype=object))
+        hashes = category_hash[patient_ids.cat.codes.to_numpy()]
+    else:
+        hashes = pd.util.hash_array(patient_ids.astype(str).to_numpy(dtype=object))
+    return (hashes % np.uint64(n_buckets)).astype(np.int32)
+
+def buckets_for(patient_ids: Iterable, n_buckets: int) -> List[int]:
+    """Buckets holding the given patients"""
+    return sorted(set(patient_bucket(pd.Series([str(pid) for pid in patient_ids], dtype=object), n_buckets)))
+
+def choose_n_buckets(df: pd.DataFrame, target_bytes: int = TARGET_ROW_GROUP_BYTES) -> int:
+    """Patient buckets so each bucket's row group holds roughly target_bytes in memory"""
+    total_bytes = df.memory_usage(deep=True, index=False).sum()
+    return int(min(MAX_BUCKETS, max(1, math.ceil(total_bytes / target_bytes))))
+
+def write_processed(df: pd.DataFrame, path: Union[str, Path],
+                    target_row_group_bytes: int = TARGET_ROW_GROUP_BYTES) -> None:
+    """
+    Write a processed artifact as one Parquet file partitioned by patient hash bucket.
+
+    Rows are grouped by patient bucket and sorted by (patient_id, visit_month)
+    within it; every bucket is one row group, and the bucket of each row group
+    is recorded in the file metadata so ProcessedDataset reads only the
+    buckets of the requested patients and restores the (patient_id,
+    visit_month) order on read. Artifacts below target_row_group_bytes are a
+    single bucket. Only categorical/string columns are dictionary encoded (the
+    NPX floats are near-unique, so dictionary pages only cost decode time).
+    The file is written next to the target and renamed into place.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df = df.reset_index(drop=True)
+
+    sort_keys = [key for key in SORT_KEYS if key in df.columns]
+    n_buckets = choose_n_buckets(df, target_row_group_bytes) if 'patient_id' in df.columns else 1
+    buckets = patient_bucket(df['patient_id'], n_buckets) if n_buckets > 1 else np.zeros(len(df), dtype=np.int32)
+    order = df.assign(_bucket=buckets).sort_values(['_bucket', *sort_keys], kind='stable').index
+    df = df.loc[order].reset_index(drop=True)
+    bucket_rows = np.bincount(buckets, minlength=n_buckets)
+    # (bucket, first row, rows) of every row group
+    row_groups = [
+        (int(bucket), int(start + offset), int(min(MAX_ROW_GROUP_ROWS, bucket_rows[bucket] - offset)))
+        for bucket, start in zip(range(n_buckets), np.cumsum(bucket_rows) - bucket_rows)
+        for offset in range(0, bucket_rows[bucket], MAX_ROW_GROUP_ROWS)
+    ]
+
+    dictionary_cols = [
+        col for col in df.columns
+        if isinstance(df[col].dtype, pd.CategoricalDtype) or df[col].dtype == object
+    ]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    layout = {
+        'sort_keys': sort_keys,
+        'n_buckets': n_buckets,
+        'row_group_buckets': [bucket for bucket, _, _ in row_groups],
+    }
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), LAYOUT_KEY: json.dumps(layout)})
+
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    # Row groups are selected through the layout metadata, so min/max statistics are not written
+    with pq.ParquetWriter(tmp_path, table.schema, use_dictionary=dictionary_cols or False,
+                          write_statistics=False) as writer:
+        if not row_groups:
+            writer.write_table(table)
+        for _, start, rows in row_groups:
+            writer.write_table(table.slice(start, rows), row_group_size=rows)
+    os.replace(tmp_path, path)
+
+def read_layout(source: Union[str, Path, pq.ParquetFile]) -> dict:
+    """Layout metadata of a file written by write_processed ({} for other files and directories)"""
+    if isinstance(source, pq.ParquetFile):
+        schema = source.schema_arrow
+    elif Path(source).is_file():
+        schema = pq.read_schema(source)
+    else:
+        return {}
+    metadata = schema.metadata or {}
+    return json.loads(metadata[LAYOUT_KEY]) if LAYOUT_KEY in metadata else {}
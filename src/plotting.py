@@ -0,0 +1,149 @@
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+def _pyplot():
+    """Headless pyplot; imported on first render so callers never pay for it"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def group_trajectories(
+    clinical: pd.DataFrame,
+    proteins: pd.DataFrame,
+    protein_ids: Iterable[str],
+    n_patients: Optional[int] = 5
+) -> Dict[str, List[dict]]:
+    """
+    Split protein and UPDRS3 trajectories by (protein, patient) in one pass.
+
+    Returns a mapping protein -> list of {'patient_id', 'visit_month', 'npx',
+    'updrs_3'} with numpy arrays sorted by visit_month, ready to send to a
+    render worker.
+    """
+    protein_ids = [str(prot) for prot in protein_ids]
+    measurements = proteins[['visit_id', 'patient_id', 'visit_month', 'UniProt', 'NPX']]
+    measurements = measurements[measurements['UniProt'].astype(str).isin(protein_ids)].copy()
+    measurements = measurements.astype({'UniProt': 'category', 'patient_id': 'category'})
+    # Loader frames share one key dictionary, so this merge compares codes
+    data = measurements.merge(clinical[['visit_id', 'updrs_3']], on='visit_id', how='left')
+    data = data.sort_values(['UniProt', 'patient_id', 'visit_month']).reset_index(drop=True)
+
+    # Contiguous (protein, patient) blocks after the sort: split at boundaries
+    uniprot = data['UniProt'].cat.codes.to_numpy()
+    patient = data['patient_id'].cat.codes.to_numpy()
+    starts = np.flatnonzero(np.r_[True, (uniprot[1:] != uniprot[:-1]) | (patient[1:] != patient[:-1])])
+    ends = np.r_[starts[1:], len(data)]
+
+    months = data['visit_month'].to_numpy()
+    npx = data['NPX'].to_numpy(dtype=np.float64)
+    updrs = data['updrs_3'].to_numpy(dtype=np.float64)
+    uniprot_names = data['UniProt'].cat.categories
+    patient_names = data['patient_id'].cat.categories
+    grouped: Dict[str, List[dict]] = {prot: [] for prot in protein_ids}
+    for start, end in zip(starts, ends):
+        prot = uniprot_names[uniprot[start]]
+        if n_patients is not None and len(grouped[prot]) >= n_patients:
+            continue
+        grouped[prot].append({
+            'patient_id': patient_names[patient[start]],
+            'visit_month': months[start:end],
+            'npx': npx[start:end],
+            'updrs_3': updrs[start:end],
+        })
+    return grouped
+
+def render_trajectory(protein_id: str, trajectories: Sequence[dict], output_path: str) -> str:
+    """Plot protein vs UPDRS3 trajectories for sample patients"""
+    plt = _pyplot()
+    fig, ax1 = plt.subplots(figsize=(10, 4))
+    ax2 = ax1.twinx()
+
+    for patient in trajectories:
+        ax1.plot(patient['visit_month'], patient['npx'], 'o-', label=f'Protein {protein_id}')
+        ax2.plot(patient['visit_month'], patient['updrs_3'], 'r--', label='UPDRS3')
+
+    ax1.set_xlabel('Visit Month')
+    ax1.set_ylabel('NPX (Normalized Protein Expression)')
+    ax2.set_ylabel('UPDRS3 Score', color='r')
+    ax1.set_title(f'{protein_id} vs UPDRS3 Trajectories')
+    fig.tight_layout()
+    fig.savefig(output_path)
+    plt.close(fig)
+    return output_path
+
+def render_feature_importance(features: Sequence[str], importances: Sequence[float],
+                              target: str, output_path: str) -> str:
+    """Save feature importance plot"""
+    plt = _pyplot()
+    importance = pd.DataFrame({
+        'feature': list(features),
+        'importance': list(importances)
+    }).sort_values('importance', ascending=False)
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.barh(importance['feature'][:15], importance['importance'][:15])
+    ax.set_title(f'{target} Feature Importance')
+    fig.tight_layout()
+    fig.savefig(output_path)
+    plt.close(fig)
+    return output_path
+
+class PlotRenderer:
+    """Render figures on a background process pool with the Agg backend.
+
+    submit() returns immediately, so training or analysis code keeps running
+    while figures are drawn; close() waits for the outstanding renders.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._futures: List[Future] = []
+
+    def submit(self, render, *args) -> Future:
+        """Queue one render_* call"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        future = self._pool.submit(render, *args)
+        self._futures.append(future)
+        return future
+
+    def submit_trajectories(self, grouped: Dict[str, List[dict]], output_dir: Path) -> List[Future]:
+        """Queue one trajectory figure per protein from group_trajectories output"""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        return [
+            self.submit(render_trajectory, prot, trajectories, str(output_dir / f'{prot}_trajectories.png'))
+            for prot, trajectories in grouped.items() if trajectories
+        ]
+
+    def close(self) -> List[str]:
+        """Wait for every queued figure and return the written paths"""
+        try:
+            return [future.result() for future in self._futures]
+        finally:
+            self._shutdown()
+
+    def _shutdown(self, cancel: bool = False) -> None:
+        if cancel:
+            for future in self._futures:
+                future.cancel()
+        self._futures = []
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> 'PlotRenderer':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # On an error in the with-block, drop queued renders instead of waiting on them
+        if exc_type is None:
+            self.close()
+        else:
+            self._shutdown(cancel=True)
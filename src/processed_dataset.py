@@ -0,0 +1,132 @@
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Union
+from config import PROCESSED_DIR
+from src.parquet_layout import buckets_for, read_layout
+
+class ProcessedDataset:
+    """Lazy view over a processed Parquet artifact.
+
+    Column selections and row filters accumulate without touching the data and
+    are pushed down to the Parquet reader when to_pandas() is called, so only
+    the requested columns and matching row groups are read. For files from
+    src.parquet_layout.write_processed, where_patients reads only the row
+    groups of the patients' hash buckets and rows come back in the
+    (patient_id, visit_month) order the file was written from.
+    """
+
+    def __init__(self, path: Union[str, Path], columns: Optional[List[str]] = None,
+                 row_filter: Optional[ds.Expression] = None):
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Processed data not found at: {self.path}")
+        self.columns = columns
+        self.row_filter = row_filter
+        # One footer read serves the layout, the schema and row-group reads
+        self._file = pq.ParquetFile(self.path) if self.path.is_file() else None
+        self.layout = read_layout(self._file) if self._file is not None else {}
+        self._dataset = None  # dataset scanner, created when a read needs it
+        # Columns row_filter reads (None: a custom expression that may read any column)
+        self._filter_columns: Optional[Set[str]] = set() if row_filter is None else None
+        self._buckets: Optional[Set[int]] = None  # patient buckets to read (None: all)
+
+    @classmethod
+    def open(cls, name: str, base_path: Union[str, Path] = '.') -> 'ProcessedDataset':
+        """Open an artifact in data/processed by file name"""
+        return cls(Path(base_path) / PROCESSED_DIR / name)
+
+    @property
+    def schema_columns(self) -> List[str]:
+        """All columns stored in the artifact"""
+        schema = self._file.schema_arrow if self._file is not None else self._scanner().schema
+        return [name for name in schema.names if not name.startswith('__index_level_')]
+
+    def _scanner(self) -> ds.Dataset:
+        if self._dataset is None:
+            self._dataset = ds.dataset(str(self.path), format='parquet')
+        return self._dataset
+
+    def _derive(self, columns=None, row_filter=None, filter_columns=(), buckets=None) -> 'ProcessedDataset':
+        derived = ProcessedDataset.__new__(ProcessedDataset)
+        derived.path = self.path
+        derived.layout = self.layout
+        derived._file = self._file
+        derived._dataset = self._dataset
+        derived.columns = self.columns if columns is None else columns
+        derived.row_filter = self.row_filter if row_filter is None else row_filter
+        derived._filter_columns = self._filter_columns if filter_columns == () else filter_columns
+        derived._buckets = self._buckets if buckets is None else buckets
+        return derived
+
+    def _and_filter(self, expression: ds.Expression, columns: Optional[Iterable[str]],
+                    buckets: Optional[Set[int]] = None) -> 'ProcessedDataset':
+        combined = expression if self.row_filter is None else self.row_filter & expression
+        filter_columns = None
+        if self._filter_columns is not None and columns is not None:
+            filter_columns = self._filter_columns | set(columns)
+        if buckets is not None and self._buckets is not None:
+            buckets = buckets & self._buckets
+        return self._derive(row_filter=combined, filter_columns=filter_columns, buckets=buckets)
+
+    def select(self, columns: Iterable[str] = (), prefix: Optional[str] = None) -> 'ProcessedDataset':
+        """Restrict to the given columns plus any column starting with prefix"""
+        wanted = list(dict.fromkeys(columns))
+        if prefix is not None:
+            wanted += [col for col in self.schema_columns if col.startswith(prefix) and col not in wanted]
+        missing = set(wanted) - set(self.schema_columns)
+        if missing:
+            raise KeyError(f"Columns not in {self.path.name}: {', '.join(sorted(missing))}")
+        return self._derive(columns=wanted)
+
+    def where(self, expression: ds.Expression) -> 'ProcessedDataset':
+        """AND an arbitrary pyarrow dataset expression into the row filter"""
+        return self._and_filter(expression, None)
+
+    def where_patients(self, patient_ids: Iterable) -> 'ProcessedDataset':
+        """Keep only rows for the given patients"""
+        # Raw loaders read patient_id as string categories
+        patient_ids = [str(pid) for pid in patient_ids]
+        buckets = set(buckets_for(patient_ids, self.layout['n_buckets'])) if 'n_buckets' in self.layout else None
+        return self._and_filter(ds.field('patient_id').isin(patient_ids), ['patient_id'], buckets)
+
+    def where_months(self, start: Optional[int] = None, end: Optional[int] = None) -> 'ProcessedDataset':
+        """Keep rows with start <= visit_month <= end (either bound optional)"""
+        expression = None
+        if start is not None:
+            expression = ds.field('visit_month') >= start
+        if end is not None:
+            upper = ds.field('visit_month') <= end
+            expression = upper if expression is None else expression & upper
+        return self if expression is None else self._and_filter(expression, ['visit_month'])
+
+    def to_pandas(self) -> pd.DataFrame:
+        """Materialise the view, reading only the selected columns and rows"""
+        if not self.layout:
+            table = self._scanner().to_table(columns=self.columns, filter=self.row_filter)
+            return table.to_pandas()
+
+        row_groups = [
+            i for i, bucket in enumerate(self.layout['row_group_buckets'])
+            if self._buckets is None or bucket in self._buckets
+        ]
+        columns = self.columns if self.columns is not None else self.schema_columns
+        sort_keys = self.layout['sort_keys'] if len(row_groups) > 1 else []
+        read_columns = columns + [key for key in sort_keys if key not in columns]
+        if self._filter_columns is None:
+            # A custom expression may read any column, so leave column resolution to the scanner
+            dataset = self._scanner()
+            fragment = next(dataset.get_fragments()).subset(row_group_ids=row_groups)
+            subset = ds.FileSystemDataset([fragment], dataset.schema, dataset.format, dataset.filesystem)
+            table = subset.to_table(columns=read_columns, filter=self.row_filter)
+        else:
+            # The direct file reader is much faster than the dataset scanner over several row groups
+            read_columns += [col for col in sorted(self._filter_columns) if col not in read_columns]
+            table = self._file.read_row_groups(row_groups, columns=read_columns)
+            if self.row_filter is not None:
+                table = table.filter(self.row_filter)
+        df = table.to_pandas()
+        if sort_keys:
+            df = df.sort_values(sort_keys, kind='stable', ignore_index=True)
+        return df if list(df.columns) == columns else df[columns]
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.data_loader import load_clinical_data, load_key_dictionary, load_proteins
+from src.key_dictionary import KeyDictionary
+
+def write_raw(base_path: Path, patients) -> None:
+    """Minimal clinical and protein CSVs for the given patient ids"""
+    raw = base_path / 'data' / 'raw'
+    raw.mkdir(parents=True, exist_ok=True)
+    visits = [(f'{p}_{m}', p, m) for p in patients for m in [0, 6]]
+    clinical = pd.DataFrame(visits, columns=['visit_id', 'patient_id', 'visit_month'])
+    for i, target in enumerate(['updrs_1', 'updrs_2', 'updrs_3', 'updrs_4']):
+        clinical[target] = float(i)
+    clinical['upd23b_clinical_state_on_medication'] = ['On', 'Off'] * len(patients)
+    clinical.to_csv(raw / 'train_clinical_data.csv', index=False)
+    proteins = clinical[['visit_id', 'patient_id', 'visit_month']].assign(UniProt='O00391', NPX=1.0)
+    proteins.to_csv(raw / 'train_proteins.csv', index=False)
+
+def test_loaders_share_key_categories(tmp_path):
+    write_raw(tmp_path, [10, 20])
+    clinical, proteins = load_clinical_data(tmp_path), load_proteins(tmp_path)
+    assert clinical['visit_id'].dtype == proteins['visit_id'].dtype
+    assert clinical['visit_id'].notna().all() and proteins['patient_id'].notna().all()
+
+def test_new_data_drop_refits_dictionary(tmp_path):
+    write_raw(tmp_path, [10, 20])
+    load_clinical_data(tmp_path)
+    write_raw(tmp_path, [10, 20, 3000])
+    clinical = load_clinical_data(tmp_path)
+    assert clinical['visit_id'].notna().all()
+    assert '3000_6' in load_key_dictionary(tmp_path).categories['visit_id']
+
+def test_unknown_keys_raise_instead_of_becoming_nan(tmp_path):
+    write_raw(tmp_path, [10, 20])
+    stale = KeyDictionary().fit(pd.DataFrame({'visit_id': ['10_0', '10_6'], 'patient_id': ['10', '10']}))
+    with pytest.raises(ValueError, match='not in the key dictionary'):
+        load_clinical_data(tmp_path, keys=stale)
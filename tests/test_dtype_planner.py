@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+from features.clinical_enricher import _add_temporal_features, _adjust_medication_effect
+from src.dtype_planner import (FEATURE_CATEGORIES, MemoryBudget, MemoryBudgetExceeded,
+                               enforce_feature_dtypes, optimize_dtypes, plan_dtypes)
+
+def test_long_follow_up_months_are_widened():
+    assert plan_dtypes(pd.DataFrame({'visit_month': [0, 60, 127]})) == {'visit_month': 'int8'}
+    df = pd.DataFrame({'visit_month': [0, 127, 132, 300]})
+    assert plan_dtypes(df) == {'visit_month': 'int16'}
+    np.testing.assert_array_equal(optimize_dtypes(df)['visit_month'].to_numpy(), [0, 127, 132, 300])
+
+def test_disease_stage_labels_match_feature_categories():
+    # updrs_3 values that reach every np.select branch, NaN included
+    updrs_3 = [10.0, 25.0, 45.0, np.nan, 12.0, 50.0]
+    df = pd.DataFrame({
+        'visit_id': [f'{p}_{m}' for p, m in zip([1, 1, 1, 2, 2, 2], [0, 6, 12, 0, 6, 12])],
+        'patient_id': pd.Categorical(['1', '1', '1', '2', '2', '2']),
+        'visit_month': np.array([0, 6, 12, 0, 6, 12], dtype='int16'),
+        'on_medication': np.array([0, 1, 0, 1, 0, 1], dtype='int8'),
+        'updrs_1': 1.0, 'updrs_2': 2.0, 'updrs_3': updrs_3, 'updrs_4': 0.0,
+    })
+    result = _add_temporal_features(_adjust_medication_effect(df))
+    assert list(result['disease_stage'].cat.categories) == FEATURE_CATEGORIES['disease_stage']
+    assert result['disease_stage'].notna().all()
+    assert set(result['disease_stage']) == set(FEATURE_CATEGORIES['disease_stage'])
+
+def test_unknown_category_label_raises():
+    df = pd.DataFrame({'disease_stage': ['early', 'severe']})
+    with pytest.raises(ValueError, match='severe'):
+        enforce_feature_dtypes(df)
+
+def test_reserve_fails_before_allocation():
+    budget = MemoryBudget(limit_mb=1.0)
+    frame = pd.DataFrame({'NPX': np.zeros(1000, dtype='float32')})
+    budget.track('load', frame)
+    with pytest.raises(MemoryBudgetExceeded, match='pivot'):
+        budget.reserve('pivot', 5.0, frame)
+    assert budget.report()['stage'].tolist() == ['load', 'pivot (planned)']
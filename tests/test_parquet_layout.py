@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.parquet_layout import buckets_for, read_layout, write_processed
+from src.processed_dataset import ProcessedDataset
+
+def make_wide(n_patients: int = 300, seed: int = 0) -> pd.DataFrame:
+    """Shuffled visits with a categorical patient_id and a few NPX columns"""
+    rng = np.random.default_rng(seed)
+    patient_ids = np.repeat(np.arange(n_patients), 4).astype(str)
+    months = np.tile([0, 6, 12, 24], n_patients).astype('int16')
+    df = pd.DataFrame({
+        'visit_id': pd.Series(patient_ids).str.cat(months.astype(str), sep='_'),
+        'patient_id': pd.Categorical(patient_ids),
+        'visit_month': months,
+    })
+    for protein in ['O00391', 'P05067', 'Q9Y6K9']:
+        df[f'NPX_{protein}'] = rng.lognormal(10, 1, len(df)).astype('float32')
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+def write_bucketed(df: pd.DataFrame, path: Path) -> dict:
+    """Write with row groups small enough to get several buckets"""
+    write_processed(df, path, target_row_group_bytes=df.memory_usage(deep=True).sum() // 8)
+    return read_layout(path)
+
+def test_buckets_are_row_groups_and_reads_keep_sort_order(tmp_path):
+    df = make_wide()
+    layout = write_bucketed(df, tmp_path / 'wide.parquet')
+    assert layout['n_buckets'] > 1
+    assert pq.ParquetFile(tmp_path / 'wide.parquet').num_row_groups == len(layout['row_group_buckets'])
+
+    expected = df.sort_values(['patient_id', 'visit_month'], ignore_index=True)
+    pd.testing.assert_frame_equal(ProcessedDataset(tmp_path / 'wide.parquet').to_pandas(), expected)
+
+def test_patient_reads_only_touch_their_buckets(tmp_path, monkeypatch):
+    df = make_wide()
+    layout = write_bucketed(df, tmp_path / 'wide.parquet')
+    patients = ['7', '42']
+    read_groups = []
+    original = pq.ParquetFile.read_row_groups
+
+    def recording_read(self, row_groups, **kwargs):
+        read_groups.extend(row_groups)
+        return original(self, row_groups, **kwargs)
+
+    monkeypatch.setattr(pq.ParquetFile, 'read_row_groups', recording_read)
+
+    view = ProcessedDataset(tmp_path / 'wide.parquet').select(['visit_id', 'NPX_O00391']).where_patients(patients)
+    result = view.where_months(end=12).to_pandas()
+    expected = df[df['patient_id'].isin(patients) & (df['visit_month'] <= 12)]
+    expected = expected.sort_values(['patient_id', 'visit_month'], ignore_index=True)[['visit_id', 'NPX_O00391']]
+    pd.testing.assert_frame_equal(result, expected)
+    wanted = set(buckets_for(patients, layout['n_buckets']))
+    assert {layout['row_group_buckets'][i] for i in read_groups} == wanted
+    assert len(read_groups) < len(layout['row_group_buckets'])
+
+    # Custom expressions go through the dataset scanner on the same row groups
+    custom = ProcessedDataset(tmp_path / 'wide.parquet').where_patients(patients).where(ds.field('visit_month') <= 12)
+    pd.testing.assert_frame_equal(custom.select(['visit_id', 'NPX_O00391']).to_pandas(), expected)
+
+def test_small_and_empty_artifacts(tmp_path):
+    df = make_wide(5)
+    assert read_layout(tmp_path) == {}
+    write_processed(df, tmp_path / 'small.parquet')
+    assert read_layout(tmp_path / 'small.parquet')['row_group_buckets'] == [0]
+    write_processed(df.iloc[:0], tmp_path / 'empty.parquet')
+    assert ProcessedDataset(tmp_path / 'empty.parquet').to_pandas().empty
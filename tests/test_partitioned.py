@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+from features.partitioned import run_partitioned
+from features.clinical_enricher import _adjust_medication_effect, _add_temporal_features
+from features.temporal_features import build_temporal_features
+from features.biomarker_features import create_biomarker_features
+
+VISIT_MONTHS = [0, 6, 12, 18, 24, 36, 48]
+
+def make_clinical(n_patients: int = 60, seed: int = 0) -> pd.DataFrame:
+    """Shuffled synthetic visits with a categorical patient_id, as the loaders produce"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for patient in range(n_patients):
+        for month in sorted(rng.choice(VISIT_MONTHS, rng.integers(2, len(VISIT_MONTHS)), replace=False)):
+            rows.append((f'{patient}_{month}', str(patient), month))
+    df = pd.DataFrame(rows, columns=['visit_id', 'patient_id', 'visit_month'])
+    # Every shard sees the full category list, only part of it observed
+    df['patient_id'] = df['patient_id'].astype('category')
+    df['visit_month'] = df['visit_month'].astype('int8')
+    for target in ['updrs_1', 'updrs_2', 'updrs_3', 'updrs_4']:
+        df[target] = rng.integers(0, 60, len(df)).astype('float32')
+    df['on_medication'] = rng.integers(0, 2, len(df)).astype('int8')
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+def make_proteins(clinical: pd.DataFrame, seed: int = 1) -> pd.DataFrame:
+    """Wide NPX table for most of the clinical visits"""
+    rng = np.random.default_rng(seed)
+    df = clinical[['patient_id', 'visit_month']].sample(frac=0.8, random_state=seed).reset_index(drop=True)
+    for protein in ['O00391', 'P05067', 'Q9Y6K9']:
+        df[f'NPX_{protein}'] = rng.lognormal(10, 1, len(df)).astype('float32')
+    return df
+
+@pytest.mark.parametrize('n_jobs', [2, 3])
+def test_clinical_stage_matches_single_process(n_jobs):
+    clinical = _adjust_medication_effect(make_clinical())
+    expected = _add_temporal_features(clinical.copy())
+    result = run_partitioned('clinical', {'df': clinical.copy()}, n_jobs=n_jobs)
+    pd.testing.assert_frame_equal(result, expected)
+
+@pytest.mark.parametrize('n_jobs', [2, 3])
+def test_temporal_stage_matches_single_process(n_jobs):
+    clinical = _adjust_medication_effect(make_clinical())
+    proteins = make_proteins(clinical)
+    expected = build_temporal_features(clinical.copy(), proteins.copy())
+    result = run_partitioned('temporal', {'clinical': clinical.copy(), 'protein_features': proteins.copy()},
+                             n_jobs=n_jobs)
+    pd.testing.assert_frame_equal(result, expected)
+
+@pytest.mark.parametrize('n_jobs', [2, 3])
+def test_biomarker_stage_matches_single_process(n_jobs):
+    df = make_clinical().sort_values(['patient_id', 'visit_month']).reset_index(drop=True)
+    rng = np.random.default_rng(2)
+    for column in ['O00391', 'P05067', 'Q9Y6K9_delta']:
+        df[column] = rng.normal(size=len(df)).astype('float32')
+    expected = create_biomarker_features(df.copy(), n_jobs=1)
+    result = create_biomarker_features(df.copy(), n_jobs=n_jobs)
+    pd.testing.assert_frame_equal(result, expected)
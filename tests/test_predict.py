@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from modeling.eval.metrics import clinical_smape
+from modeling.predict import PRIMARY, ParkinsonPredictor
+
+MODEL_PATH = str(Path(__file__).parent.parent / 'modeling' / 'models' / 'updrs_3_adj' / 'model.txt')
+
+def make_predictor(**kwargs) -> ParkinsonPredictor:
+    """Primary model with the same file loaded as a shadow, with a budget that never skips it"""
+    return ParkinsonPredictor(MODEL_PATH, shadow_model_paths={'candidate': MODEL_PATH},
+                              shadow_latency_budget_ms=1e9, **kwargs)
+
+def test_shadows_do_not_change_accepted_input():
+    np.random.seed(0)
+    sample = ParkinsonPredictor.create_sample_input(5)
+    duplicated = sample.set_index(pd.Index(['v1', 'v1', 'v2', 'v3', 'v4']))
+    plain, shadowed = ParkinsonPredictor(MODEL_PATH), make_predictor()
+    for batch in [sample, duplicated]:
+        pd.testing.assert_frame_equal(shadowed.predict(batch), plain.predict(batch))
+    # Without usable visit keys only the shadow bookkeeping is skipped
+    assert shadowed.scoring_stats[PRIMARY]['calls'] == 2
+    assert shadowed.scoring_stats['candidate']['calls'] == 0
+    assert len(shadowed._pending_truth) == 0
+
+def test_ground_truth_is_matched_per_visit():
+    np.random.seed(1)
+    sample = ParkinsonPredictor.create_sample_input(6)
+    sample['visit_id'] = [f'{patient}_{month}' for patient, month in zip(range(6), sample['visit_month'])]
+    predictor = make_predictor()
+    predictions = predictor.predict(sample)['predicted_updrs3_adj'].to_numpy()
+    by_visit = pd.Series(predictions, index=sample['visit_id'])
+
+    # Truth arrives out of order, with a visit never predicted and a repeated visit
+    truth = pd.Series([20.0, 35.0, 10.0, 50.0, 12.0],
+                      index=[sample['visit_id'][3], sample['visit_id'][0], 'unknown_0',
+                             sample['visit_id'][5], sample['visit_id'][3]])
+    predictor.record_ground_truth(truth)
+
+    matched = truth[~truth.index.duplicated(keep='last')].drop('unknown_0')
+    expected = clinical_smape(matched.to_numpy(), by_visit[matched.index].to_numpy(), 'updrs_3_adj')
+    for name in [PRIMARY, 'candidate']:
+        stats = predictor.scoring_stats[name]
+        assert stats['truth_rows'] == 3
+        np.testing.assert_allclose(stats['smape_sum'] / stats['truth_rows'], expected)
+
+    # Matched visits are scored once
+    predictor.record_ground_truth(truth)
+    assert predictor.scoring_stats[PRIMARY]['truth_rows'] == 3
+    assert set(predictor._pending_truth) == {sample['visit_id'][i] for i in [1, 2, 4]}
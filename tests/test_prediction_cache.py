@@ -0,0 +1,98 @@
+import shutil
+import sys
+from pathlib import Path
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+import modeling.prediction_cache as prediction_cache
+from modeling.fast_inference import HighThroughputScorer
+from modeling.prediction_cache import PredictionCache, cached_predict, model_file_version
+from modeling.predict import ParkinsonPredictor
+from modeling.submission import api_wrapper
+
+MODELS = Path(__file__).parent.parent / 'modeling' / 'models'
+
+class Clock:
+    """Stand-in for time.time() in the cache module"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def keys(n: int, prefix: str = 'k'):
+    return [f'{prefix}{i}' for i in range(n)]
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2)
+    cache.put_many(['a', 'b'], np.array([1.0, 2.0]))
+    cache.get_many(['a'])  # 'b' is now the least recently used
+    cache.put_many(['c'], np.array([3.0]))
+    values, missing = cache.get_many(['a', 'b', 'c'])
+    np.testing.assert_array_equal(missing, [False, True, False])
+    np.testing.assert_array_equal(values[~missing], [1.0, 3.0])
+
+def test_entries_expire_after_ttl(monkeypatch, tmp_path):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache.time, 'time', clock)
+    cache = PredictionCache(ttl_seconds=10, disk_path=tmp_path / 'cache.sqlite')
+    cache.put_many(['a'], np.array([1.0]))
+    clock.now += 5
+    assert not cache.get_many(['a'])[1].any()
+    clock.now += 10
+    assert cache.get_many(['a'])[1].all()
+    # The next write deletes expired rows from disk
+    cache.put_many(['b'], np.array([2.0]))
+    assert cache.disk_entries() == 1
+
+def test_disk_tier_is_shared_and_bounded(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    writer = PredictionCache(disk_path=path, max_disk_entries=100)
+    writer.put_many(keys(80), np.arange(80.0))
+    reader = PredictionCache(disk_path=path)
+    values, missing = reader.get_many(keys(80))
+    assert not missing.any() and reader.stats()['disk_hits'] == 80
+    np.testing.assert_array_equal(values, np.arange(80.0))
+
+    writer.put_many(keys(40, 'new'), np.arange(40.0))
+    assert writer.disk_entries() == int(100 * prediction_cache.DISK_TRIM_FRACTION)
+    # The oldest rows go first
+    fresh = PredictionCache(disk_path=path)
+    assert not fresh.get_many(keys(40, 'new'))[1].any()
+    assert fresh.get_many(keys(30))[1].all()
+
+def test_reload_model_invalidates_cached_predictions():
+    np.random.seed(0)
+    sample = ParkinsonPredictor.create_sample_input(4)
+    cache = PredictionCache()
+    predictor = ParkinsonPredictor(str(MODELS / 'updrs_3_adj' / 'model.txt'), cache=cache)
+    predictor.predict(sample)
+    predictor.predict(sample)
+    assert cache.stats()['hits'] == 4
+
+    predictor.reload_model(str(MODELS / 'updrs_3_adj' / 'model.txt'))
+    assert cache.stats()['entries'] == 0
+    predictor.predict(sample)
+    assert cache.stats()['misses'] == 8
+
+def test_scorer_versions_key_its_own_models(tmp_path, monkeypatch):
+    # The scorer loads updrs_1 from another directory than api_wrapper.MODEL_DIR, which is empty
+    (tmp_path / 'updrs_1').mkdir()
+    shutil.copy(MODELS / 'updrs_2' / 'model.txt', tmp_path / 'updrs_1' / 'model.txt')
+    monkeypatch.setattr(api_wrapper, 'MODEL_DIR', tmp_path / 'missing')
+    scorer = HighThroughputScorer(model_dir=tmp_path, iteration=None)
+    assert scorer.versions == {'updrs_1': model_file_version(tmp_path / 'updrs_1' / 'model.txt')}
+
+    np.random.seed(1)
+    api_data = ParkinsonPredictor.create_sample_input(5).assign(patient_id=[1, 1, 2, 2, 3])
+    cache = PredictionCache()
+    # A prediction cached for the default updrs_1 model on the same rows must not be reused
+    default = HighThroughputScorer(iteration=None)
+    features = api_wrapper.preprocess_input(api_data.copy())[default.models['updrs_1'].feature_name()]
+    cached_predict(cache, lambda X: default.predict_matrix('updrs_1', X), features.to_numpy(dtype=np.float64),
+                   f"updrs_1:{default.versions['updrs_1']}:None:float32")
+
+    results = api_wrapper.predict_test_set(api_data.copy(), cache=cache, scorer=scorer)
+    np.testing.assert_allclose(results['updrs_1'], scorer.predict_target('updrs_1', features))
+    assert cache.stats()['misses'] == 10
@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+from modeling.submission.api_wrapper import preprocess_input
+from modeling.submission.scoring_session import BIOMARKER_COLS, OnlineScoringSession
+
+FEATURES = ['visit_gap', 'months_since_first'] + [f'{col}_delta' for col in BIOMARKER_COLS]
+
+def make_history(n_patients: int = 20, seed: int = 0) -> pd.DataFrame:
+    """Visits sorted by patient and month, with biomarker values"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for patient in range(n_patients):
+        months = np.sort(rng.choice([0, 6, 12, 18, 24, 36, 48], rng.integers(1, 6), replace=False))
+        for month in months:
+            rows.append((f'{patient}_{month}', f'p{patient}', month))
+    history = pd.DataFrame(rows, columns=['visit_id', 'patient_id', 'visit_month'])
+    for col in BIOMARKER_COLS:
+        history[col] = rng.lognormal(9, 1, len(history))
+    return history
+
+def expected_features(history: pd.DataFrame) -> pd.DataFrame:
+    """Features computed on the full history at once"""
+    expected = preprocess_input(history.copy())
+    for col in BIOMARKER_COLS:
+        expected[f'{col}_delta'] = expected.groupby('patient_id')[col].diff()
+    return expected.set_index('visit_id')[FEATURES].astype(np.float64)
+
+def run_batches(session: OnlineScoringSession, batches) -> pd.DataFrame:
+    return pd.concat([session.transform(batch) for batch in batches]).set_index('visit_id')
+
+def batches_by_visit_number(history: pd.DataFrame, visits_per_batch: int, seed: int = 0):
+    """Shuffled API batches holding up to visits_per_batch consecutive visits of every patient"""
+    visit_number = history.groupby('patient_id').cumcount() // visits_per_batch
+    return [batch.sample(frac=1, random_state=seed) for _, batch in history.groupby(visit_number)]
+
+@pytest.mark.parametrize('visits_per_batch', [1, 2, 3])
+def test_session_matches_full_history(visits_per_batch):
+    history = make_history()
+    result = run_batches(OnlineScoringSession(), batches_by_visit_number(history, visits_per_batch))
+    expected = expected_features(history)
+    pd.testing.assert_frame_equal(result.loc[expected.index, FEATURES], expected)
+
+def test_checkpoint_round_trip(tmp_path):
+    history = make_history()
+    batches = batches_by_visit_number(history, 1)
+    uninterrupted = run_batches(OnlineScoringSession(), batches)
+
+    session = OnlineScoringSession()
+    first = run_batches(session, batches[:2])
+    session.checkpoint(tmp_path / 'state')  # np.savez writes state.npz
+    restored = OnlineScoringSession.restore(tmp_path / 'state')
+    assert len(restored) == len(session)
+    resumed = pd.concat([first, run_batches(restored, batches[2:])])
+    pd.testing.assert_frame_equal(resumed, uninterrupted)
+
+def test_out_of_order_visit_is_rejected():
+    history = make_history()
+    session = OnlineScoringSession()
+    session.transform(history[history['visit_month'] <= 12])
+    late = history[history['visit_month'] == 6].head(1)
+    newer = history[history['visit_month'] > 12]
+    with pytest.raises(ValueError, match=late['patient_id'].iloc[0]):
+        session.transform(pd.concat([newer, late]))
+    # Nothing from the rejected batch reached the state
+    result = session.transform(newer)
+    expected = expected_features(history)
+    pd.testing.assert_frame_equal(result.set_index('visit_id')[FEATURES], expected.loc[newer['visit_id']])